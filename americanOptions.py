@@ -0,0 +1,293 @@
+import numpy as np
+
+from simulators import advance, block_sizes
+
+# ==========================================================
+# Longstaff–Schwartz pricing of early-exercise options
+# ==========================================================
+#
+# Paths are only ever materialized at the exercise dates, stored as
+# float32, and the regressions for every strike are solved together as one
+# batch of small normal-equation systems.  The out-of-sample lower bound and
+# the Andersen–Broadie upper bound both follow the fitted exercise rule on
+# fresh paths regenerated block by block from spawned seeds, so their memory
+# is bounded by the block size.
+
+
+def payoff(S, K, option="put"):
+    """Intrinsic values for every strike in K (shape (m,)) on spots S (shape (n,))."""
+    if option == "call":
+        return np.maximum(S[None, :] - K[:, None], 0)
+    return np.maximum(K[:, None] - S[None, :], 0)
+
+
+def regression_basis(state, K, basis="laguerre", degree=3, v_ref=None):
+    """
+    Build the regressors for the continuation value.
+
+    Parameters:
+    - state: Tuple of arrays (S,) or (S, v)
+    - K: Array of strikes, shape (m,)
+    - basis: "laguerre" (weighted Laguerre polynomials) or "polynomial"
+    - degree: Number of basis polynomials
+    - v_ref: Scale for the variance regressors (Heston only)
+
+    Returns:
+    - Array of shape (m, n, p)
+    """
+    x = state[0][None, :] / K[:, None]
+    if basis == "laguerre":
+        w = np.exp(-0.5 * x)
+        L_prev, L = np.zeros_like(x), np.ones_like(x)
+        cols = [np.ones_like(x)]
+        for n in range(degree):
+            cols.append(w * L)
+            L_prev, L = L, ((2 * n + 1 - x) * L - n * L_prev) / (n + 1)
+    elif basis == "polynomial":
+        cols = [x**j for j in range(degree + 1)]
+    else:
+        raise ValueError(f"Unknown basis: {basis}")
+
+    if len(state) > 1:
+        v = np.broadcast_to(state[1][None, :] / v_ref, x.shape)
+        cols += [v, v * x]
+    return np.stack(cols, axis=-1)
+
+
+def _continuation(X, beta):
+    return np.einsum("mnp,mp->mn", X, beta)
+
+
+def _mean_and_se(samples):
+    n = samples.shape[-1]
+    return samples.mean(axis=-1), samples.std(axis=-1, ddof=1) / np.sqrt(n)
+
+
+def _simulate_exercise_states(model, paths, n_dates, steps_per_date, dt, seed, block_size):
+    states = np.empty((model.n_factors, n_dates, paths), dtype=np.float32)
+    start = 0
+    sizes = block_sizes(paths, block_size)
+    for n, ss in zip(sizes, seed.spawn(len(sizes))):
+        rng = np.random.default_rng(ss)
+        state = model.initial(n)
+        for k in range(n_dates):
+            state = advance(model, state, dt, steps_per_date, rng)
+            for f in range(model.n_factors):
+                states[f, k, start:start + n] = state[f]
+        start += n
+    return states
+
+
+def _fit_exercise_policy(model, states, K, option, disc, basis, degree, v_ref):
+    n_dates = states.shape[1]
+    S_T = states[0, -1].astype(np.float64)
+    cashflow = payoff(S_T, K, option)
+    betas = [None] * (n_dates - 1)
+
+    for k in range(n_dates - 2, -1, -1):
+        cashflow *= disc
+        state = tuple(s.astype(np.float64) for s in states[:, k])
+        h = payoff(state[0], K, option)
+        itm = (h > 0).astype(np.float64)
+
+        # Regression on in-the-money paths only, all strikes solved as one
+        # batch of normal-equation systems.
+        X = regression_basis(state, K, basis, degree, v_ref)
+        A = np.einsum("mnp,mn,mnq->mpq", X, itm, X)
+        b = np.einsum("mnp,mn->mp", X, itm * cashflow)
+        betas[k] = (np.linalg.pinv(A) @ b[..., None])[..., 0]
+
+        exercise = (h > 0) & (h > _continuation(X, betas[k]))
+        cashflow = np.where(exercise, h, cashflow)
+
+    return betas, disc * cashflow
+
+
+def _exercise(k, state, h, K, betas, n_dates, basis, degree, v_ref):
+    """Exercise decisions of the regression rule at exercise date k (h undiscounted)."""
+    if k == n_dates - 1:
+        return h > 0
+    X = regression_basis(state, K, basis, degree, v_ref)
+    return (h > 0) & (h > _continuation(X, betas[k]))
+
+
+def _follow_policy(model, K, option, betas, state, first, n_dates, steps_per_date, dt, disc, basis, degree,
+                   v_ref, rng):
+    # Cash flows, discounted to t = 0, of the regression rule followed from
+    # `state` (at the date before `first`) over exercise dates first..n_dates-1,
+    # together with the discounted spot at the stopping date (at the last
+    # date for paths never stopped).
+    value = np.zeros((len(K), state[0].size))
+    spot = np.zeros((len(K), state[0].size))
+    alive = np.ones((len(K), state[0].size), dtype=bool)
+    for k in range(first, n_dates):
+        state = advance(model, state, dt, steps_per_date, rng)
+        h = payoff(state[0], K, option)
+        stop = alive & _exercise(k, state, h, K, betas, n_dates, basis, degree, v_ref)
+        if k == n_dates - 1:
+            stop = alive
+        value[stop] = disc ** (k + 1) * h[stop]
+        spot = np.where(stop, disc ** (k + 1) * state[0][None, :], spot)
+        alive &= ~stop
+        if not alive.any():
+            break
+    return value, spot
+
+
+def _nested_continuation(model, K, option, betas, state, k, n_dates, steps_per_date, dt, disc, basis, degree,
+                         v_ref, inner_paths, rng):
+    # Continuation value at exercise date k of the rule, for every path in
+    # `state`, from `inner_paths` nested paths each.  The discounted spot at
+    # the stopping date is a martingale, so its mean is known exactly
+    # (the discounted spot now) and it serves as a control variate.
+    n = state[0].size
+    inner = tuple(np.repeat(s, inner_paths) for s in state)
+    value, spot = _follow_policy(model, K, option, betas, inner, k + 1, n_dates, steps_per_date, dt, disc, basis,
+                                 degree, v_ref, rng)
+    value = value.reshape(len(K), n, inner_paths)
+    spot = spot.reshape(len(K), n, inner_paths)
+    dv = value - value.mean(axis=-1, keepdims=True)
+    ds = spot - spot.mean(axis=-1, keepdims=True)
+    beta = np.sum(dv * ds, axis=-1) / np.maximum(np.sum(ds * ds, axis=-1), 1e-300)
+    return value.mean(axis=-1) - beta * (spot.mean(axis=-1) - disc ** (k + 1) * state[0][None, :])
+
+
+def _lower_bound(model, K, option, betas, n_dates, steps_per_date, dt, disc, basis, degree, v_ref,
+                 paths, block_size, seed):
+    values = []
+    sizes = block_sizes(paths, block_size)
+    for n, ss in zip(sizes, seed.spawn(len(sizes))):
+        rng = np.random.default_rng(ss)
+        value, _ = _follow_policy(model, K, option, betas, model.initial(n), 0, n_dates, steps_per_date, dt,
+                                  disc, basis, degree, v_ref, rng)
+        values.append(value)
+    return np.concatenate(values, axis=1)
+
+
+def _upper_bound(model, K, option, betas, n_dates, steps_per_date, dt, disc, basis, degree, v_ref,
+                 policy_value, paths, inner_paths, block_size, seed):
+    # Andersen–Broadie dual bound.  The martingale is the one of the value
+    # process L_k of the lower-bound rule: L_k is the exercise value where
+    # the rule stops and the continuation value Q_k otherwise, and
+    #
+    #     M_{k+1} - M_k = L_{k+1} - Q_k.
+    #
+    # Between two continuation dates the increments telescope, so
+    #
+    #     M_k = L_k - L_0 + sum over exercise dates j < k of (h_j - Q_j),
+    #
+    # and Q_k only has to be estimated (by nested simulation under the same
+    # rule, see `_nested_continuation`) where it enters: at in-the-money
+    # dates.  Out-of-the-money dates
+    # are left out of the maximum (Broadie–Cao sub-optimality checking),
+    # which keeps the bound valid because they are never optimal exercise
+    # dates.  L_0 is the policy value from the lower-bound pass.
+    h0 = payoff(np.array([model.S0], dtype=np.float64), K, option)
+    values = []
+    outer_block = max(1, block_size // inner_paths)
+    sizes = block_sizes(paths, outer_block)
+    for n, ss in zip(sizes, seed.spawn(len(sizes))):
+        rng = np.random.default_rng(ss)
+        state = model.initial(n)
+        exercised = np.zeros((len(K), n))
+        best = np.repeat(h0, n, axis=1)
+        for k in range(n_dates):
+            state = advance(model, state, dt, steps_per_date, rng)
+            intrinsic = payoff(state[0], K, option)
+            itm = intrinsic > 0
+            h = disc ** (k + 1) * intrinsic
+            if k == n_dates - 1:
+                # L_N = h_N, so h_N - M_N = L_0 - (sum over exercise dates).
+                best = np.maximum(best, policy_value[:, None] - exercised)
+                break
+            if not itm.any():
+                continue
+
+            need = itm.any(axis=0)
+            continuation = np.zeros_like(h)
+            continuation[:, need] = _nested_continuation(
+                model, K, option, betas, tuple(s[need] for s in state), k, n_dates, steps_per_date, dt, disc,
+                basis, degree, v_ref, inner_paths, rng
+            )
+
+            exercise = _exercise(k, state, intrinsic, K, betas, n_dates, basis, degree, v_ref)
+            L = np.where(exercise, h, continuation)
+            martingale = L - policy_value[:, None] + exercised
+            best = np.where(itm, np.maximum(best, h - martingale), best)
+            exercised += np.where(exercise, h - continuation, 0)
+        values.append(best)
+    return np.concatenate(values, axis=1)
+
+
+def longstaff_schwartz(model, K, T, option="put", exercise_dates=50, steps_per_date=4,
+                       paths=100_000, basis="laguerre", degree=3, lower_paths=None,
+                       upper_paths=500, inner_paths=400, block_size=25_000, seed=None):
+    """
+    Price Bermudan/American options with the Longstaff–Schwartz method.
+
+    Exercise is allowed at t = 0 and at `exercise_dates` equally spaced dates
+    up to T; many dates approximate an American option.
+
+    Parameters:
+    - model: simulators.GBM or simulators.Heston instance
+    - K: Strike or array of strikes (priced together on the same paths)
+    - T: Maturity
+    - option: "put" or "call"
+    - exercise_dates: Number of exercise dates after t = 0
+    - steps_per_date: Simulation steps between consecutive exercise dates
+    - paths: Regression (training) paths, stored as float32
+    - basis, degree: Regression basis, see `regression_basis`
+    - lower_paths: Fresh paths for the out-of-sample lower bound (default: `paths`)
+    - upper_paths, inner_paths: Outer and nested paths for the dual upper bound
+      (set upper_paths=0 to skip it)
+    - block_size: Paths simulated at once in the regenerated passes
+    - seed: Seed for np.random.SeedSequence
+
+    Returns:
+    - Dictionary with the in-sample price and its standard error, and the
+      lower/upper bounds with their standard errors
+    """
+    scalar = np.ndim(K) == 0
+    K = np.atleast_1d(np.asarray(K, dtype=np.float64))
+    dt = T / (exercise_dates * steps_per_date)
+    disc = np.exp(-model.r * dt * steps_per_date)
+    v_ref = getattr(model, "v0", None)
+    train_seed, lower_seed, upper_seed = np.random.SeedSequence(seed).spawn(3)
+
+    states = _simulate_exercise_states(model, paths, exercise_dates, steps_per_date, dt, train_seed,
+                                       block_size)
+    betas, cashflow = _fit_exercise_policy(model, states, K, option, disc, basis, degree, v_ref)
+    del states
+
+    h0 = payoff(np.array([model.S0], dtype=np.float64), K, option)[:, 0]
+    price, std_error = _mean_and_se(cashflow)
+    std_error = np.where(h0 > price, 0.0, std_error)
+    price = np.maximum(price, h0)
+
+    common = (exercise_dates, steps_per_date, dt, disc, basis, degree, v_ref)
+    lower_values = _lower_bound(model, K, option, betas, *common, lower_paths or paths, block_size,
+                                lower_seed)
+    policy_value, lower_se = _mean_and_se(lower_values)
+    lower_se = np.where(h0 > policy_value, 0.0, lower_se)
+    lower = np.maximum(policy_value, h0)
+
+    if upper_paths:
+        upper_values = _upper_bound(model, K, option, betas, *common, policy_value, upper_paths, inner_paths,
+                                    block_size, upper_seed)
+        upper, upper_se = _mean_and_se(upper_values)
+        # The bound is shifted by the policy value L_0, so its error adds in.
+        upper_se = np.sqrt(upper_se**2 + lower_se**2)
+    else:
+        upper, upper_se = np.full_like(K, np.nan), np.full_like(K, np.nan)
+
+    result = {
+        "price": price,
+        "std_error": std_error,
+        "lower": lower,
+        "lower_std_error": lower_se,
+        "upper": upper,
+        "upper_std_error": upper_se,
+    }
+    if scalar:
+        result = {key: float(val[0]) for key, val in result.items()}
+    return result
@@ -0,0 +1,124 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+# ==========================================================
+# Background jobs with progress and cooperative cancellation
+# ==========================================================
+#
+# A job is a generator function that yields (progress, partial_result)
+# pairs, e.g. a running Monte Carlo estimate after each batch of paths or a
+# surface with the rows finished so far.  It runs on a worker thread so the
+# script thread is free to redraw the page, and it is cancelled between two
+# yields as soon as it is superseded by a job with different inputs.
+#
+# Vectorized numpy and torch kernels release the GIL, so such jobs run
+# alongside the page.  Jobs made of pure-Python work, such as scipy's quad
+# calling a Python integrand, hold it: the interpreter still switches
+# threads every few milliseconds, so the page stays live, only slower.
+
+
+class Job:
+    def __init__(self, inputs, fn, args, kwargs):
+        self.inputs = inputs
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.progress = 0.0
+        self.partial = None
+        self.error = None
+        self.done = False
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def run(self):
+        try:
+            for progress, partial in self.fn(*self.args, **self.kwargs):
+                if self._cancelled.is_set():
+                    return
+                self.progress, self.partial = progress, partial
+            self.progress = 1.0
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+class JobManager:
+    """Keeps at most one live job per key; resubmitting with new inputs cancels the old one."""
+
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.jobs = {}
+
+    def submit(self, key, inputs, fn, *args, **kwargs):
+        """
+        Start `fn(*args, **kwargs)` under `key` unless a job with equal inputs exists.
+
+        A job with equal inputs that failed is started again, so a transient
+        error (e.g. running out of GPU memory) does not stick to the page.
+
+        Returns:
+        - The running or finished Job for these inputs
+        """
+        job = self.jobs.get(key)
+        if job is not None and job.inputs == inputs and not job.cancelled and job.error is None:
+            return job
+        if job is not None:
+            job.cancel()
+
+        job = Job(inputs, fn, args, kwargs)
+        self.jobs[key] = job
+        job.future = self.executor.submit(job.run)
+        return job
+
+    def cancel_all(self):
+        for job in self.jobs.values():
+            job.cancel()
+
+
+def get_job_manager(key="job_manager", max_workers=2):
+    """The JobManager of the current Streamlit session."""
+    if key not in st.session_state:
+        st.session_state[key] = JobManager(max_workers)
+    return st.session_state[key]
+
+
+def show_job(job, render, label="Running…", interval=0.5):
+    """
+    Draw a job's progress bar and latest partial result.
+
+    While the job runs the block refreshes itself every `interval` seconds
+    without rerunning the rest of the script; once the job finishes a final
+    full rerun stops the polling.
+
+    Parameters:
+    - job: Job returned by JobManager.submit
+    - render: Callable drawing a partial (or final) result
+    - label: Text shown next to the progress bar
+    """
+    running = not job.done
+
+    @st.fragment(run_every=interval if running else None)
+    def view():
+        if job.error is not None:
+            st.error(f"{type(job.error).__name__}: {job.error}")
+            return
+        if not job.done:
+            st.progress(job.progress, text=f"{label} {job.progress:.0%}")
+        if job.partial is not None:
+            render(job.partial)
+        if running and job.done:
+            st.rerun()
+
+    view()
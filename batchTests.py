@@ -0,0 +1,166 @@
+import streamlit as st
+import numpy as np
+
+from hypothesisTests import (
+    benjamini_hochberg, chi2_gof, chi2_independence, csv_moments, fisher_exact,
+    ttest_1samp, ttest_1samp_from_stats, welch_ttest, welch_ttest_from_stats,
+)
+from resampling import bootstrap_test, permutation_test, process_pool
+
+st.set_page_config(page_title="Batch Hypothesis Testing", layout="wide")
+st.title("Batch Hypothesis Testing")
+st.write(
+    "The tutorial examples, computed with the same vectorized engine that runs "
+    "thousands of column-wise tests at once."
+)
+
+alpha = st.sidebar.slider("Significance level (α)", 0.01, 0.10, 0.05)
+alternatives = ["two-sided", "less", "greater"]
+
+
+def show_decision(stat_name, stat, p):
+    col1, col2, col3 = st.columns(3)
+    col1.metric(stat_name, f"{stat:.4f}")
+    col2.metric("p-value", f"{p:.4f}")
+    col3.metric("Decision", "Reject H₀" if p < alpha else "Fail to reject H₀")
+
+
+@st.cache_resource
+def resampling_pool(workers):
+    """One process pool per worker count, shared across reruns and sessions."""
+    return process_pool(workers)
+
+
+@st.cache_data
+def resampling_checks(a, b, alternative, alpha, max_resamples, workers):
+    # Cached so that reruns (e.g. widget changes in other tabs) do not
+    # resample again.
+    executor = resampling_pool(workers) if workers > 1 else None
+    perm = permutation_test(a, b, alternative, alpha, max_resamples, workers=workers, executor=executor)
+    boot = bootstrap_test(a, b, alternative, alpha, max_resamples, workers=workers, executor=executor)
+    return perm, boot
+
+
+tab1, tab2, tab3, tab4, tab5 = st.tabs(
+    ["One-sample t", "Two-sample t (Welch)", "Chi-square", "Fisher exact", "Batch (CSV)"]
+)
+
+# ==========================================================
+# One-sample t-test (ttest1sample.md)
+# ==========================================================
+
+with tab1:
+    st.subheader("Do players take 10 seconds on average?")
+    times = np.array([12, 9, 11, 13, 8, 10, 12, 14])
+    st.write(f"**Times:** {times.tolist()}")
+    mu0 = st.number_input("Claimed mean (μ₀)", value=10.0)
+    alt1 = st.selectbox("Alternative", alternatives, key="alt1")
+    t_stat, p = ttest_1samp(times[:, None], mu0, alt1)
+    show_decision("t-statistic", t_stat[0], p[0])
+
+# ==========================================================
+# Two-sample t-test (ttest2sample.md, moretests.md, tstatboundries.md)
+# ==========================================================
+
+with tab2:
+    datasets = {
+        "Coffee A vs B (reaction time)": ([0.31, 0.35, 0.30, 0.33, 0.36, 0.34], [0.28, 0.27, 0.26, 0.29, 0.25, 0.27]),
+        "Fertilizer A vs B (growth)": ([10, 12, 9, 11, 10], [13, 14, 12, 15, 13]),
+    }
+    name = st.selectbox("Dataset", list(datasets))
+    A, B = (np.array(x, dtype=float) for x in datasets[name])
+    st.write(f"**A:** {A.tolist()}  \n**B:** {B.tolist()}")
+    alt2 = st.selectbox("Alternative (A vs B)", alternatives, key="alt2")
+    t_stat, p, df = welch_ttest(A[:, None], B[:, None], alt2)
+    show_decision("t-statistic", t_stat[0], p[0])
+    st.caption(f"Welch degrees of freedom: {df[0]:.2f}")
+
+    st.subheader("Distribution-free check")
+    max_resamples = st.select_slider("Max resamples", [10_000, 100_000, 1_000_000], value=100_000)
+    workers = st.slider("Worker processes", 1, 8, 1)
+    perm, boot = resampling_checks(A, B, alt2, alpha, max_resamples, workers)
+    st.dataframe({
+        "method": ["Welch t", "Permutation", "Bootstrap"],
+        "p-value": [p[0], perm["p_value"], boot["p_value"]],
+        "resamples": [None, perm["resamples"], boot["resamples"]],
+        "degenerate": [None, perm["degenerate"], boot["degenerate"]],
+        "resamples/sec": [None, perm["resamples_per_sec"], boot["resamples_per_sec"]],
+        "stopped early": [None, perm["stopped_early"], boot["stopped_early"]],
+    })
+    st.caption(
+        f"Bootstrap 95% CI for mean(A) − mean(B): [{boot['ci'][0]:.4f}, {boot['ci'][1]:.4f}]. "
+        "Resampling stops once the 99% interval of its p-value clears α; degenerate resamples "
+        "(both groups constant) are left out of the p-value."
+    )
+
+# ==========================================================
+# Chi-square tests (chi2test.md, chi2Fishertest.md)
+# ==========================================================
+
+with tab3:
+    st.subheader("Is the die fair? (goodness of fit)")
+    observed = np.array([8, 9, 10, 11, 12, 10])
+    st.write(f"**Observed counts:** {observed.tolist()}")
+    stat, p = chi2_gof(observed[:, None])
+    show_decision("χ²", stat[0], p[0])
+
+    st.subheader("Does coffee type affect sleep quality? (independence)")
+    table = np.array([[12, 8], [6, 14]])
+    st.write(table)
+    stat, p, df, expected = chi2_independence(table[None])
+    show_decision("χ²", stat[0], p[0])
+    st.caption("Expected counts under H₀")
+    st.write(expected[0])
+
+# ==========================================================
+# Fisher exact test (chi2Fishertest.md)
+# ==========================================================
+
+with tab4:
+    st.subheader("Small table: Fisher exact test")
+    table = np.array([[3, 1], [0, 4]])
+    st.write(table)
+    alt4 = st.selectbox("Alternative", alternatives, key="alt4")
+    odds, p = fisher_exact(table[None], alt4)
+    show_decision("Odds ratio", odds[0], p[0])
+
+# ==========================================================
+# Batch mode: one test per CSV column, streamed in chunks
+# ==========================================================
+
+with tab5:
+    st.write(
+        "Each column of the CSV (header row, numeric values, empty cells as missing) "
+        "is one test. Files are read in chunks, so only per-column sufficient "
+        "statistics are kept in memory. p-values are corrected with Benjamini–Hochberg."
+    )
+    test = st.radio("Test", ["One-sample t", "Welch two-sample t"], horizontal=True)
+    alt5 = st.selectbox("Alternative", alternatives, key="alt5")
+    chunk_rows = st.number_input("Rows per chunk", min_value=1_000, value=100_000, step=1_000)
+
+    file_a = st.file_uploader("CSV (group A)", type="csv")
+    file_b = st.file_uploader("CSV (group B)", type="csv") if test == "Welch two-sample t" else None
+    mu0_batch = st.number_input("μ₀", value=0.0) if test == "One-sample t" else None
+
+    if file_a is not None and (test == "One-sample t" or file_b is not None):
+        header, moments_a = csv_moments(file_a, int(chunk_rows))
+        if test == "One-sample t":
+            t_stat, p = ttest_1samp_from_stats(*moments_a.stats(), mu0_batch, alt5)
+        else:
+            header_b, moments_b = csv_moments(file_b, int(chunk_rows))
+            if header_b != header:
+                st.error("Both files must have the same columns.")
+                st.stop()
+            t_stat, p, _ = welch_ttest_from_stats(*moments_a.stats(), *moments_b.stats(), alt5)
+
+        # Non-numeric or near-empty columns (n < 2) and constant columns have
+        # no t-statistic; they are listed and left out of the FDR correction.
+        untested = [name for name, pv in zip(header, p) if np.isnan(pv)]
+        if untested:
+            st.warning(
+                f"{len(untested)} column(s) skipped (fewer than 2 values or zero variance): "
+                + ", ".join(untested)
+            )
+        reject, q = benjamini_hochberg(p, alpha)
+        st.write(f"**{reject.sum()}** of {len(header) - len(untested)} tests significant at FDR {alpha}")
+        st.dataframe({"column": header, "n (A)": moments_a.n, "t": t_stat, "p": p, "q (BH)": q, "reject": reject})
@@ -4,6 +4,8 @@ import matplotlib.pyplot as plt
 from scipy.stats import norm
 from scipy.integrate import quad
 
+from computeGraph import ComputeGraph
+
 st.set_page_config(page_title="Black–Scholes & Heston Option Lab", layout="wide")
 st.title("📊 Black–Scholes & Heston Option Pricing Lab")
 st.caption("Pricing, Greeks, Monte Carlo, and volatility smiles")
@@ -71,7 +73,7 @@ def heston_price(S, K, T, r, kappa, theta, sigma, rho, v0, option="call"):
 # Heston Monte Carlo
 # ==========================================================
 
-def heston_mc(S, K, T, r, kappa, theta, sigma, rho, v0, paths=5000, steps=200, option="call"):
+def heston_mc_terminal(S, T, r, kappa, theta, sigma, rho, v0, paths=5000, steps=200):
     dt = T / steps
     S_t = np.full(paths, S)
     v_t = np.full(paths, v0)
@@ -80,12 +82,21 @@ def heston_mc(S, K, T, r, kappa, theta, sigma, rho, v0, paths=5000, steps=200, o
         z1 = np.random.normal(size=paths)
         z2 = rho * z1 + np.sqrt(1 - rho**2) * np.random.normal(size=paths)
 
-        v_t = np.maximum(v_t + kappa * (theta - v_t) * dt + sigma * np.sqrt(v_t * dt) * z2, 0)
         S_t *= np.exp((r - 0.5 * v_t) * dt + np.sqrt(v_t * dt) * z1)
+        v_t = np.maximum(v_t + kappa * (theta - v_t) * dt + sigma * np.sqrt(v_t * dt) * z2, 0)
 
-    payoff = np.maximum(S_t - K, 0) if option == "call" else np.maximum(K - S_t, 0)
+    return S_t
+
+
+def mc_price(S_T, K, T, r, option="call"):
+    payoff = np.maximum(S_T - K, 0) if option == "call" else np.maximum(K - S_T, 0)
     return np.exp(-r * T) * payoff.mean()
 
+
+def heston_mc(S, K, T, r, kappa, theta, sigma, rho, v0, paths=5000, steps=200, option="call"):
+    S_T = heston_mc_terminal(S, T, r, kappa, theta, sigma, rho, v0, paths, steps)
+    return mc_price(S_T, K, T, r, option)
+
 # ==========================================================
 # Sidebar inputs
 # ==========================================================
@@ -107,13 +118,62 @@ sigma_h = st.sidebar.slider("σ (vol of vol)", 0.1, 1.0, 0.5)
 rho = st.sidebar.slider("ρ", -0.9, 0.0, -0.7)
 v0 = st.sidebar.slider("v₀", 0.01, 0.2, 0.04)
 
+# ==========================================================
+# Computation graph
+# ==========================================================
+# Each section below is a node that declares the inputs it reads, so a
+# rerun only recomputes what a widget change actually invalidated: moving
+# the strike reprices the cached MC terminal samples and redoes a single
+# closed-form price, while the strike sweep and the smile (which do not
+# depend on K) are served from the cache.
+
+graph = st.session_state.setdefault("heston_lab_graph", ComputeGraph())
+graph.set_inputs(S=S, K=K, T=T, r=r, option=option, sigma_bs=sigma_bs,
+                 kappa=kappa, theta=theta, sigma_h=sigma_h, rho=rho, v0=v0)
+
+HESTON_INPUTS = ("S", "T", "r", "kappa", "theta", "sigma_h", "rho", "v0")
+strikes = np.linspace(60, 140, 40)
+
+
+@graph.node(*HESTON_INPUTS)
+def mc_terminal(S, T, r, kappa, theta, sigma_h, rho, v0):
+    return heston_mc_terminal(S, T, r, kappa, theta, sigma_h, rho, v0)
+
+
+@graph.node("mc_terminal", "K", "T", "r", "option")
+def mc_estimate(mc_terminal, K, T, r, option):
+    return mc_price(mc_terminal, K, T, r, option)
+
+
+@graph.node(*HESTON_INPUTS, "K", "option")
+def heston_closed_form(S, T, r, kappa, theta, sigma_h, rho, v0, K, option):
+    return heston_price(S, K, T, r, kappa, theta, sigma_h, rho, v0, option)
+
+
+@graph.node(*HESTON_INPUTS, "sigma_bs", "option")
+def strike_curves(S, T, r, kappa, theta, sigma_h, rho, v0, sigma_bs, option):
+    bs_curve = [bs_price(S, k, T, r, sigma_bs, option) for k in strikes]
+    h_curve = [heston_price(S, k, T, r, kappa, theta, sigma_h, rho, v0, option) for k in strikes]
+    return bs_curve, h_curve
+
+
+@graph.node("strike_curves", "S", "T", "r", "sigma_bs", "option")
+def iv_smile(strike_curves, S, T, r, sigma_bs, option):
+    ivs = []
+    for k, price in zip(strikes, strike_curves[1]):
+        vol = sigma_bs
+        for _ in range(20):
+            vol -= (bs_price(S, k, T, r, vol, option) - price) / max(1e-5, bs_greeks(S, k, T, r, vol, option)[2])
+        ivs.append(vol)
+    return ivs
+
 # ==========================================================
 # Pricing results
 # ==========================================================
 
 bs = bs_price(S, K, T, r, sigma_bs, option)
-heston = heston_price(S, K, T, r, kappa, theta, sigma_h, rho, v0, option)
-mc = heston_mc(S, K, T, r, kappa, theta, sigma_h, rho, v0, option=option)
+heston = graph["heston_closed_form"]
+mc = graph["mc_estimate"]
 
 st.subheader("💰 Prices")
 st.metric("Black–Scholes", f"{bs:.4f}")
@@ -134,9 +194,7 @@ st.write({"Delta": delta, "Gamma": gamma, "Vega": vega, "Theta": theta_g})
 # ==========================================================
 
 st.subheader("📈 Price vs Strike")
-strikes = np.linspace(60, 140, 40)
-bs_curve = [bs_price(S, k, T, r, sigma_bs, option) for k in strikes]
-h_curve = [heston_price(S, k, T, r, kappa, theta, sigma_h, rho, v0, option) for k in strikes]
+bs_curve, h_curve = graph["strike_curves"]
 
 fig1 = plt.figure()
 plt.plot(strikes, bs_curve, label="Black–Scholes")
@@ -146,13 +204,7 @@ st.pyplot(fig1)
 
 st.subheader("🌈 Implied Vol Smile (Heston)")
 
-ivs = []
-for k in strikes:
-    price = heston_price(S, k, T, r, kappa, theta, sigma_h, rho, v0, option)
-    vol = sigma_bs
-    for _ in range(20):
-        vol -= (bs_price(S, k, T, r, vol, option) - price) / max(1e-5, bs_greeks(S, k, T, r, vol, option)[2])
-    ivs.append(vol)
+ivs = graph["iv_smile"]
 
 fig2 = plt.figure()
 plt.plot(strikes, ivs)
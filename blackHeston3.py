@@ -11,6 +11,8 @@ from scipy.integrate import quad
 from scipy.optimize import minimize
 import torch
 
+from backgroundJobs import get_job_manager, show_job
+
 st.set_page_config(page_title="Advanced Option Pricing Lab", layout="wide")
 st.title("🚀 Advanced Option Pricing & Volatility Lab")
 st.caption("Black–Scholes, Heston, FFT (Carr–Madan), Jumps, Calibration, GPU Monte Carlo")
@@ -45,11 +47,21 @@ def heston_cf(phi, S, T, r, kappa, theta, sigma, rho, v0):
     a = kappa * theta
     b = kappa
     d = np.sqrt((rho * sigma * phi * i - b)**2 + sigma**2 * (phi**2 + i * phi))
-    g = (b - rho * sigma * phi * i + d) / (b - rho * sigma * phi * i - d)
-    C = r * phi * i * T + a / sigma**2 * ((b - rho * sigma * phi * i + d) * T - 2 * np.log((1 - g * np.exp(d * T)) / (1 - g)))
-    D = (b - rho * sigma * phi * i + d) / sigma**2 * ((1 - np.exp(d * T)) / (1 - g * np.exp(d * T)))
+    # "Little trap" form: stays on the principal branch of the log for long maturities
+    g = (b - rho * sigma * phi * i - d) / (b - rho * sigma * phi * i + d)
+    C = r * phi * i * T + a / sigma**2 * ((b - rho * sigma * phi * i - d) * T - 2 * np.log((1 - g * np.exp(-d * T)) / (1 - g)))
+    D = (b - rho * sigma * phi * i - d) / sigma**2 * ((1 - np.exp(-d * T)) / (1 - g * np.exp(-d * T)))
     return np.exp(C + D * v0 + i * phi * np.log(S))
 
+
+def heston_price(S, K, T, r, kappa, theta, sigma, rho, v0, option="call"):
+    cf = lambda u: heston_cf(u, S, T, r, kappa, theta, sigma, rho, v0)
+    forward = S * np.exp(r * T)
+    P1 = 0.5 + quad(lambda phi: np.real(np.exp(-1j * phi * np.log(K)) * cf(phi - 1j) / (1j * phi * forward)), 0, 100)[0] / np.pi
+    P2 = 0.5 + quad(lambda phi: np.real(np.exp(-1j * phi * np.log(K)) * cf(phi) / (1j * phi)), 0, 100)[0] / np.pi
+    call = S * P1 - K * np.exp(-r * T) * P2
+    return call if option == "call" else call - S + K * np.exp(-r * T)
+
 # ==========================================================
 # Carr–Madan FFT pricing
 # ==========================================================
@@ -79,8 +91,7 @@ def merton_cf(phi, S, T, r, sigma, lam, mu_j, sig_j):
 # GPU Monte Carlo (Heston)
 # ==========================================================
 
-def heston_mc_gpu(S, K, T, r, kappa, theta, sigma, rho, v0, paths=200_000, steps=200):
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+def _heston_gpu_payoffs(S, K, T, r, kappa, theta, sigma, rho, v0, paths, steps, device):
     dt = T / steps
     S_t = torch.full((paths,), S, device=device)
     v_t = torch.full((paths,), v0, device=device)
@@ -88,12 +99,47 @@ def heston_mc_gpu(S, K, T, r, kappa, theta, sigma, rho, v0, paths=200_000, steps
     for _ in range(steps):
         z1 = torch.randn(paths, device=device)
         z2 = rho * z1 + torch.sqrt(torch.tensor(1 - rho**2, device=device)) * torch.randn(paths, device=device)
-        v_t = torch.clamp(v_t + kappa * (theta - v_t) * dt + sigma * torch.sqrt(v_t * dt) * z2, min=0)
         S_t = S_t * torch.exp((r - 0.5 * v_t) * dt + torch.sqrt(v_t * dt) * z1)
+        v_t = torch.clamp(v_t + kappa * (theta - v_t) * dt + sigma * torch.sqrt(v_t * dt) * z2, min=0)
+
+    return torch.clamp(S_t - K, min=0)
+
 
-    payoff = torch.clamp(S_t - K, min=0)
+def heston_mc_gpu(S, K, T, r, kappa, theta, sigma, rho, v0, paths=200_000, steps=200):
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    payoff = _heston_gpu_payoffs(S, K, T, r, kappa, theta, sigma, rho, v0, paths, steps, device)
     return torch.exp(torch.tensor(-r * T, device=device)) * payoff.mean()
 
+
+def heston_mc_gpu_stream(S, K, T, r, kappa, theta, sigma, rho, v0, paths=200_000, steps=200, batch=20_000):
+    """Run `heston_mc_gpu` in batches, yielding (progress, running estimate) after each batch."""
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    disc = np.exp(-r * T)
+    done, total, total_sq = 0, 0.0, 0.0
+    while done < paths:
+        n = min(batch, paths - done)
+        payoff = _heston_gpu_payoffs(S, K, T, r, kappa, theta, sigma, rho, v0, n, steps, device).double()
+        total += payoff.sum().item()
+        total_sq += (payoff**2).sum().item()
+        done += n
+
+        mean = total / done
+        se = np.sqrt(max(total_sq / done - mean**2, 0) / max(done - 1, 1))
+        yield done / paths, {"price": disc * mean, "ci": (disc * (mean - 1.96 * se), disc * (mean + 1.96 * se)), "paths": done}
+
+
+def vol_surface_rows(S, r, kappa, theta, sigma, rho, v0, strikes, maturities):
+    """Heston implied-vol surface, yielding (progress, surface so far) after each maturity row."""
+    vol_surface = np.full((len(maturities), len(strikes)), np.nan)
+    for i, T_ in enumerate(maturities):
+        for j, K_ in enumerate(strikes):
+            price = heston_price(S, K_, T_, r, kappa, theta, sigma, rho, v0)
+            vol = 0.2
+            for _ in range(10):
+                vol -= (bs_price(S, K_, T_, r, vol) - price) / max(1e-4, bs_greeks(S, K_, T_, r, vol)[2])
+            vol_surface[i, j] = vol
+        yield (i + 1) / len(maturities), vol_surface.copy()
+
 # ==========================================================
 # Calibration (Heston to market data)
 # ==========================================================
@@ -143,30 +189,45 @@ st.pyplot(fig)
 # Volatility surface (synthetic)
 # ==========================================================
 
+# Both sections below run as background jobs: the page keeps drawing while
+# they work, shows partial results as they arrive, and a parameter change
+# cancels the stale job instead of waiting for it.
+jobs = get_job_manager()
+heston_inputs = (S, T, r, kappa, theta, sigma_h, rho, v0)
+
 st.subheader("🌈 Volatility Surface (Heston)")
 strikes = np.linspace(70, 130, 20)
 maturities = np.linspace(0.3, 2.0, 10)
-vol_surface = np.zeros((len(maturities), len(strikes)))
-
-for i, T_ in enumerate(maturities):
-    for j, K_ in enumerate(strikes):
-        price = heston_price(S, K_, T_, r, kappa, theta, sigma_h, rho, v0)
-        vol = 0.2
-        for _ in range(10):
-            vol -= (bs_price(S, K_, T_, r, vol) - price) / max(1e-4, bs_greeks(S, K_, T_, r, vol)[2])
-        vol_surface[i, j] = vol
-
-fig2 = plt.figure()
-plt.imshow(vol_surface, aspect='auto', origin='lower', extent=[strikes[0], strikes[-1], maturities[0], maturities[-1]])
-plt.colorbar(label="Implied Vol")
-plt.xlabel("Strike")
-plt.ylabel("Maturity")
-st.pyplot(fig2)
+
+
+def draw_surface(vol_surface):
+    fig2 = plt.figure()
+    plt.imshow(vol_surface, aspect='auto', origin='lower', extent=[strikes[0], strikes[-1], maturities[0], maturities[-1]])
+    plt.colorbar(label="Implied Vol")
+    plt.xlabel("Strike")
+    plt.ylabel("Maturity")
+    st.pyplot(fig2)
+    plt.close(fig2)
+
+
+# The surface spans its own maturity grid, so it is keyed without T.
+surface_inputs = (S, r, kappa, theta, sigma_h, rho, v0)
+surface_job = jobs.submit("vol_surface", surface_inputs, vol_surface_rows,
+                          S, r, kappa, theta, sigma_h, rho, v0, strikes, maturities)
+show_job(surface_job, draw_surface, label="Building surface…")
 
 # ==========================================================
 # GPU Monte Carlo
 # ==========================================================
 
 st.subheader("🔥 GPU Monte Carlo (Heston)")
-mc_gpu = heston_mc_gpu(S, 100, T, r, kappa, theta, sigma_h, rho, v0)
-st.write("GPU Monte Carlo Price:", mc_gpu.item())
+
+
+def draw_mc(estimate):
+    low, high = estimate["ci"]
+    st.write(f"GPU Monte Carlo Price: {estimate['price']:.4f} (95% CI {low:.4f} – {high:.4f}, {estimate['paths']:,} paths)")
+
+
+mc_job = jobs.submit("heston_mc_gpu", heston_inputs, heston_mc_gpu_stream,
+                     S, 100, T, r, kappa, theta, sigma_h, rho, v0)
+show_job(mc_job, draw_mc, label="Simulating paths…")
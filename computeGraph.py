@@ -0,0 +1,77 @@
+# ==========================================================
+# Dependency-aware incremental recomputation
+# ==========================================================
+#
+# Streamlit reruns the whole script on every widget change.  Keeping a
+# ComputeGraph in st.session_state lets each section declare which inputs
+# (or other sections) it reads; on a rerun only the sections downstream of a
+# changed input are recomputed, everything else is served from the cache.
+#
+#     graph = st.session_state.setdefault("graph", ComputeGraph())
+#     graph.set_inputs(S=S, K=K, ...)
+#
+#     @graph.node("S", "T", "r")
+#     def terminal_samples(S, T, r): ...
+#
+#     graph["terminal_samples"]
+
+
+class ComputeGraph:
+    def __init__(self):
+        self.inputs = {}
+        self.nodes = {}
+        self.values = {}
+        self.versions = {}
+        self.stamps = {}
+
+    def set_inputs(self, **inputs):
+        """Update input values; only inputs whose value changed invalidate their dependants."""
+        for name, value in inputs.items():
+            if name not in self.inputs or not _same(self.inputs[name], value):
+                self.inputs[name] = value
+                self.versions[name] = self.versions.get(name, 0) + 1
+
+    def node(self, *deps, name=None):
+        """
+        Register a computation reading `deps` (input or node names).
+
+        The function is called with the dependencies as keyword arguments.
+        Re-registering a node with the same dependencies (as happens on every
+        Streamlit rerun) keeps its cached value.
+        """
+        def register(func):
+            key = name or func.__name__
+            if key in self.nodes and self.nodes[key][1] != deps:
+                self.stamps.pop(key, None)
+            self.nodes[key] = (func, deps)
+            return func
+        return register
+
+    def __getitem__(self, name):
+        if name in self.inputs:
+            return self.inputs[name]
+
+        func, deps = self.nodes[name]
+        args = {d: self[d] for d in deps}
+        stamp = tuple(self.versions[d] for d in deps)
+        if self.stamps.get(name) != stamp:
+            self.values[name] = func(**args)
+            self.versions[name] = self.versions.get(name, 0) + 1
+            self.stamps[name] = stamp
+        return self.values[name]
+
+    def is_stale(self, name):
+        """True if reading `name` would trigger a recomputation."""
+        if name in self.inputs:
+            return False
+        deps = self.nodes[name][1]
+        if any(self.is_stale(d) for d in deps):
+            return True
+        return self.stamps.get(name) != tuple(self.versions.get(d) for d in deps)
+
+
+def _same(a, b):
+    try:
+        return bool(a == b)
+    except ValueError:
+        return a is b
@@ -2,14 +2,16 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 
+from sde import simulate
+
 st.set_page_config(
     page_title="Euler-Maruyama SDE Simulator",
     layout="wide"
 )
 
-def euler_maruyama(mu, sigma, x0, t0, t_end, step_size, num_simulations=1):
+def euler_maruyama(mu, sigma, x0, t0, t_end, step_size, num_simulations=1, scheme="euler"):
     """
-    Solve an SDE using the Euler-Maruyama method.
+    Solve dX = mu X dt + sigma X dW using the Euler-Maruyama (or Milstein) method.
 
     Parameters:
     - mu: Drift coefficient
@@ -19,21 +21,19 @@ def euler_maruyama(mu, sigma, x0, t0, t_end, step_size, num_simulations=1):
     - t_end: End time
     - step_size: Step size
     - num_simulations: Number of simulations (paths)
+    - scheme: "euler" or "milstein" (see sde.simulate)
 
     Returns:
     - Lists of t and X values for each simulation
     """
     num_steps = int((t_end - t0) / step_size)
-    t = np.linspace(t0, t_end, num_steps + 1)
-    X = np.zeros((num_simulations, num_steps + 1))
-    X[:, 0] = x0
-
-    for i in range(num_simulations):
-        for j in range(num_steps):
-            dW = np.random.normal(0, np.sqrt(step_size))
-            X[i, j + 1] = X[i, j] + mu * X[i, j] * step_size + sigma * X[i, j] * dW
-
-    return t, X
+    return simulate(
+        lambda t, x: mu * x,
+        lambda t, x: sigma * x,
+        x0, t_end, num_steps, num_simulations, scheme,
+        diffusion_dx=lambda t, x: sigma,
+        t0=t0,
+    )
 
 # Streamlit UI
 st.title("Euler-Maruyama Method for SDEs")
@@ -57,12 +57,13 @@ with col2:
     sigma = st.number_input("Diffusion coefficient (sigma):", value=0.1)
     step_size = st.number_input("Step size (e.g., 0.01):", min_value=0.001, max_value=0.1, value=0.01)
     num_simulations = st.number_input("Number of simulations (paths):", min_value=1, max_value=10, value=3)
+    scheme = st.selectbox("Scheme:", ["euler", "milstein"])
 
 t0 = 0
 
 # mu, sigma, x0, t_end, step_size, num_simulations=1,.1,1,1,.001,5
 # Solve SDE
-t, X = euler_maruyama(mu, sigma, x0, t0, t_end, step_size, num_simulations)
+t, X = euler_maruyama(mu, sigma, x0, t0, t_end, step_size, num_simulations, scheme)
 
 # Plot the results
 fig, ax = plt.subplots(figsize=(12, 6))
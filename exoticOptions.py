@@ -0,0 +1,256 @@
+import numpy as np
+
+from simulators import block_sizes
+
+# ==========================================================
+# Path-dependent payoffs priced in a single streaming pass
+# ==========================================================
+#
+# A payoff never sees the whole path.  It declares the running accumulators
+# it needs (average, max/min, barrier survival); the engine keeps one copy
+# of each distinct accumulator, updates it inside the time-stepping loop and
+# evaluates every payoff on the terminal price plus the accumulated values.
+# Memory is O(paths) however many steps or payoffs there are.
+
+
+# ----------------------------------------------------------
+# Running accumulators
+# ----------------------------------------------------------
+
+class ArithmeticAverage:
+    key = ("average", "arithmetic")
+
+    def reset(self, S0, paths):
+        self.total = np.zeros(paths)
+        self.count = 0
+
+    def update(self, S_prev, S, dt, vol, rng):
+        self.total += S
+        self.count += 1
+
+    def result(self):
+        return self.total / self.count
+
+
+class GeometricAverage:
+    key = ("average", "geometric")
+
+    def reset(self, S0, paths):
+        self.total = np.zeros(paths)
+        self.count = 0
+
+    def update(self, S_prev, S, dt, vol, rng):
+        self.total += np.log(S)
+        self.count += 1
+
+    def result(self):
+        return np.exp(self.total / self.count)
+
+
+class RunningExtremum:
+    """
+    Running maximum or minimum of the price.
+
+    With `continuous=True` the extremum of the Brownian bridge between two
+    grid points is sampled exactly in log space, which removes the discrete
+    monitoring bias of lookbacks.
+    """
+
+    def __init__(self, kind="max", continuous=False):
+        self.kind = kind
+        self.continuous = continuous
+        self.key = (kind, continuous)
+
+    def reset(self, S0, paths):
+        self.value = np.full(paths, float(S0))
+
+    def update(self, S_prev, S, dt, vol, rng):
+        if self.continuous:
+            a, b = np.log(S_prev), np.log(S)
+            spread = np.sqrt((b - a)**2 - 2 * vol**2 * dt * np.log(rng.uniform(size=S.shape)))
+            ext = np.exp(0.5 * (a + b + spread)) if self.kind == "max" else np.exp(0.5 * (a + b - spread))
+        else:
+            ext = S
+        self.value = np.maximum(self.value, ext) if self.kind == "max" else np.minimum(self.value, ext)
+
+    def result(self):
+        return self.value
+
+
+class BarrierSurvival:
+    """
+    Probability that the path has not touched `level`.
+
+    A grid point beyond the barrier kills the path outright; between grid
+    points the Brownian-bridge crossing probability
+    exp(-2 ln(B/S_prev) ln(B/S) / (vol^2 dt)) is folded into the survival
+    weight instead of being left to discrete monitoring.
+    """
+
+    def __init__(self, level, direction="down"):
+        self.level = level
+        self.direction = direction
+        self.key = ("barrier", level, direction)
+
+    def reset(self, S0, paths):
+        self.survival = np.ones(paths)
+        self._update_hit(np.full(paths, float(S0)))
+
+    def _update_hit(self, S):
+        hit = S <= self.level if self.direction == "down" else S >= self.level
+        self.survival[hit] = 0.0
+
+    def update(self, S_prev, S, dt, vol, rng):
+        log_b = np.log(self.level)
+        var = np.maximum(vol**2 * dt, 1e-300)
+        exponent = -2 * (log_b - np.log(S_prev)) * (log_b - np.log(S)) / var
+        self.survival *= 1 - np.exp(np.minimum(exponent, 0))
+        self._update_hit(S)
+
+    def result(self):
+        return self.survival
+
+
+# ----------------------------------------------------------
+# Payoffs
+# ----------------------------------------------------------
+
+def _intrinsic(S, K, option):
+    return np.maximum(S - K, 0) if option == "call" else np.maximum(K - S, 0)
+
+
+class VanillaOption:
+    def __init__(self, K, option="call", name=None):
+        self.K = K
+        self.option = option
+        self.name = name or f"{option} K={K}"
+
+    def accumulators(self):
+        return []
+
+    def payoff(self, S_T, acc):
+        return _intrinsic(S_T, self.K, self.option)
+
+
+class AsianOption:
+    """Average-price option; the average runs over all simulation dates after t = 0."""
+
+    def __init__(self, K, option="call", average="arithmetic", name=None):
+        self.K = K
+        self.option = option
+        self.average = ArithmeticAverage() if average == "arithmetic" else GeometricAverage()
+        self.name = name or f"{average} asian {option} K={K}"
+
+    def accumulators(self):
+        return [self.average]
+
+    def payoff(self, S_T, acc):
+        return _intrinsic(acc[self.average.key], self.K, self.option)
+
+
+class BarrierOption:
+    """Knock-in or knock-out vanilla, e.g. kind="down-and-out"."""
+
+    def __init__(self, K, barrier, kind="down-and-out", option="call", name=None):
+        direction, _, knock = kind.split("-")
+        self.K = K
+        self.option = option
+        self.knock = knock
+        self.barrier = BarrierSurvival(barrier, direction)
+        self.name = name or f"{kind} {option} K={K} B={barrier}"
+
+    def accumulators(self):
+        return [self.barrier]
+
+    def payoff(self, S_T, acc):
+        survival = acc[self.barrier.key]
+        weight = survival if self.knock == "out" else 1 - survival
+        return weight * _intrinsic(S_T, self.K, self.option)
+
+
+class LookbackOption:
+    """Lookback option; floating strike when K is None, fixed strike otherwise."""
+
+    def __init__(self, option="call", K=None, continuous=True, name=None):
+        self.option = option
+        self.K = K
+        kind = ("max" if option == "call" else "min") if K is not None else ("min" if option == "call" else "max")
+        self.extremum = RunningExtremum(kind, continuous)
+        self.name = name or f"lookback {option} " + ("floating" if K is None else f"K={K}")
+
+    def accumulators(self):
+        return [self.extremum]
+
+    def payoff(self, S_T, acc):
+        ext = acc[self.extremum.key]
+        if self.K is None:
+            return S_T - ext if self.option == "call" else ext - S_T
+        return _intrinsic(ext, self.K, self.option)
+
+
+# ----------------------------------------------------------
+# Engine
+# ----------------------------------------------------------
+
+def local_vol(model, state):
+    """Instantaneous volatility of the price over the next step."""
+    if model.n_factors > 1:
+        return np.sqrt(state[1])
+    return model.sigma
+
+
+def price_path_dependent(model, payoffs, T, steps=200, paths=100_000, block_size=50_000, seed=None):
+    """
+    Price several path-dependent payoffs from one simulation.
+
+    Parameters:
+    - model: simulators.GBM or simulators.Heston instance
+    - payoffs: List of payoff objects (VanillaOption, AsianOption, ...)
+    - T: Maturity
+    - steps: Number of time steps (monitoring dates)
+    - paths: Total number of paths
+    - block_size: Paths simulated at once; bounds the memory use
+    - seed: Seed for np.random.SeedSequence
+
+    Returns:
+    - Dictionary mapping payoff name to (price, standard error); names must
+      be unique (pass `name=` to tell identical contracts apart)
+    """
+    names = [p.name for p in payoffs]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate payoff names: {duplicates}")
+
+    accumulators = {}
+    for p in payoffs:
+        for acc in p.accumulators():
+            accumulators.setdefault(acc.key, acc)
+
+    dt = T / steps
+    total = np.zeros(len(payoffs))
+    total_sq = np.zeros(len(payoffs))
+    sizes = block_sizes(paths, block_size)
+    for n, ss in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        rng = np.random.default_rng(ss)
+        state = model.initial(n)
+        for acc in accumulators.values():
+            acc.reset(model.S0, n)
+
+        for _ in range(steps):
+            vol = local_vol(model, state)
+            z = rng.standard_normal((model.n_factors, n))
+            new_state = model.step(state, dt, z)
+            for acc in accumulators.values():
+                acc.update(state[0], new_state[0], dt, vol, rng)
+            state = new_state
+
+        values = {key: acc.result() for key, acc in accumulators.items()}
+        for i, p in enumerate(payoffs):
+            x = p.payoff(state[0], values)
+            total[i] += x.sum()
+            total_sq[i] += (x**2).sum()
+
+    disc = np.exp(-model.r * T)
+    mean = total / paths
+    std_error = np.sqrt(np.maximum(total_sq / paths - mean**2, 0) / (paths - 1))
+    return {p.name: (float(disc * mean[i]), float(disc * std_error[i])) for i, p in enumerate(payoffs)}
@@ -2,6 +2,8 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 
+from computeGraph import ComputeGraph
+
 st.set_page_config(page_title="Geometric Brownian Motion Simulator", layout="wide")  # Unique browser tab title
 # App title
 st.title("Geometric Brownian Motion Simulator")
@@ -29,21 +31,49 @@ steps = st.sidebar.slider("Number of steps", 100, 10000, 1000)
 num_simulations = st.sidebar.slider("Number of simulations", 1, 100, 5)
 
 # Simulate GBM
-def simulate_gbm(mu, sigma, S0, T, steps, num_simulations):
+def simulate_gbm(mu, sigma, S0, T, steps, num_simulations, rng=None):
+    rng = rng or np.random.default_rng()
     dt = T / steps
     t = np.linspace(0, T, steps + 1)
-    S = np.zeros((num_simulations, steps + 1))
+    S = np.empty((num_simulations, steps + 1))
     S[:, 0] = S0
 
-    for i in range(num_simulations):
-        for j in range(1, steps + 1):
-            dW = np.random.normal(0, np.sqrt(dt))
-            S[i, j] = S[i, j - 1] * (1 + mu * dt + sigma * dW)
+    dW = rng.normal(0, np.sqrt(dt), size=(num_simulations, steps))
+    S[:, 1:] = S0 * np.cumprod(1 + mu * dt + sigma * dW, axis=1)
 
     return t, S
 
+
+class GBMPaths:
+    """Paths drawn so far for one parameter set; asking for more extends the same RNG stream."""
+
+    def __init__(self, mu, sigma, S0, T, steps, seed=None):
+        self.params = (mu, sigma, S0, T, steps)
+        self.rng = np.random.default_rng(seed)
+        self.t = np.linspace(0, T, steps + 1)
+        self.S = np.empty((0, steps + 1))
+
+    def take(self, num_simulations):
+        missing = num_simulations - len(self.S)
+        if missing > 0:
+            _, extra = simulate_gbm(*self.params, missing, self.rng)
+            self.S = np.vstack([self.S, extra])
+        return self.t, self.S[:num_simulations]
+
+
+# Only a change of the model parameters redraws the paths; changing the
+# number of simulations reuses (or extends) the paths already drawn.
+graph = st.session_state.setdefault("gbm_graph", ComputeGraph())
+graph.set_inputs(mu=mu, sigma=sigma, S0=S0, T=T, steps=steps)
+
+
+@graph.node("mu", "sigma", "S0", "T", "steps")
+def paths(mu, sigma, S0, T, steps):
+    return GBMPaths(mu, sigma, S0, T, steps)
+
+
 # Run simulation
-t, S = simulate_gbm(mu, sigma, S0, T, steps, num_simulations)
+t, S = graph["paths"].take(num_simulations)
 
 # Plot results
 st.subheader("Simulated Paths")
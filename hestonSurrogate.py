@@ -0,0 +1,276 @@
+import json
+import os
+
+import numpy as np
+
+# ==========================================================
+# Chebyshev surrogate tables for Heston prices
+# ==========================================================
+#
+# For a fixed parameter set the normalized call price C / S is a smooth
+# function of log-moneyness ln(K / S), maturity and (optionally) v0.  It is
+# sampled once on a tensor Chebyshev grid with a vectorized exact pricer,
+# the grid values are turned into Chebyshev coefficients, and the
+# coefficients are saved as a plain .npy file (memory-mappable) next to a
+# small JSON file with the parameters, domain and measured error bound.
+# Evaluating the table is a couple of small matrix products, so thousands of
+# prices cost microseconds each.
+
+PARAM_NAMES = ("r", "kappa", "theta", "sigma", "rho", "v0")
+
+
+# ----------------------------------------------------------
+# Vectorized exact pricer
+# ----------------------------------------------------------
+
+def heston_cf(u, T, r, kappa, theta, sigma, rho, v0):
+    """Characteristic function of ln S_T for S_0 = 1 ("little trap" form), broadcasting over all inputs."""
+    i = 1j
+    b = kappa - rho * sigma * u * i
+    d = np.sqrt(b**2 + sigma**2 * (u**2 + i * u))
+    g = (b - d) / (b + d)
+    e = np.exp(-d * T)
+    C = r * u * i * T + kappa * theta / sigma**2 * ((b - d) * T - 2 * np.log((1 - g * e) / (1 - g)))
+    D = (b - d) / sigma**2 * ((1 - e) / (1 - g * e))
+    return np.exp(C + D * v0)
+
+
+def heston_call_normalized(log_moneyness, T, r, kappa, theta, sigma, rho, v0, nodes=None, u_max=None):
+    """
+    Heston call price divided by spot, C(S, K, T) / S, for arrays of ln(K / S), T and v0.
+
+    The Gil-Pelaez integrals for P1 and P2 are evaluated for every point at
+    once with one fixed Gauss-Legendre rule.  The integrands decay roughly
+    like exp(-v T u^2 / 2), so by default the range is widened for short
+    maturities and low variances (at least [0, 200], two nodes per unit).
+    """
+    if u_max is None:
+        v_low = max(min(float(np.min(v0)), theta), 1e-6)
+        u_max = float(np.clip(np.sqrt(60.0 / (v_low * float(np.min(T)))), 200.0, 2_000.0))
+    nodes = nodes or int(2 * u_max)
+    x, w = np.polynomial.legendre.leggauss(nodes)
+    u = 0.5 * u_max * (x + 1)
+    w = 0.5 * u_max * w
+
+    k = np.asarray(log_moneyness, dtype=np.float64)[..., None]
+    T = np.asarray(T, dtype=np.float64)[..., None]
+    v0 = np.asarray(v0, dtype=np.float64)[..., None]
+    phase = np.exp(-1j * u * k) / (1j * u)
+    P1 = 0.5 + np.real(phase * heston_cf(u - 1j, T, r, kappa, theta, sigma, rho, v0)) @ w / np.pi * np.exp(-r * T[..., 0])
+    P2 = 0.5 + np.real(phase * heston_cf(u, T, r, kappa, theta, sigma, rho, v0)) @ w / np.pi
+    return P1 - np.exp(k[..., 0] - r * T[..., 0]) * P2
+
+
+# ----------------------------------------------------------
+# Surrogate table
+# ----------------------------------------------------------
+
+def _to_unit(x, lo, hi):
+    return (2 * np.asarray(x, dtype=np.float64) - (lo + hi)) / (hi - lo)
+
+
+def _from_unit(z, lo, hi):
+    return 0.5 * (lo + hi) + 0.5 * (hi - lo) * z
+
+
+def _chebyshev_nodes(n):
+    return np.cos(np.pi * (np.arange(n) + 0.5) / n)
+
+
+def _chebyshev_basis(z, n):
+    """T_0(z) .. T_{n-1}(z) as columns, via T_j(cos a) = cos(j a); z is clamped to [-1, 1]."""
+    return np.cos(np.arccos(np.clip(z, -1.0, 1.0))[:, None] * np.arange(n))
+
+
+class HestonSurrogate:
+    """
+    Tensor-Chebyshev interpolant of Heston call prices for one parameter set.
+
+    The axes are log-moneyness ln(K / S), maturity, and optionally v0; when
+    v0 is not an axis it is part of the fixed parameter set.
+    """
+
+    def __init__(self, coefficients, params, domain, error_bound=None):
+        self.coefficients = coefficients
+        self.params = params
+        self.domain = domain
+        self.error_bound = error_bound
+
+    @property
+    def has_v0_axis(self):
+        return len(self.domain) == 3
+
+    @classmethod
+    def build(cls, params, moneyness=(0.6, 1.6), maturity=(0.1, 3.0), v0_range=None, degree=(48, 16, 8)):
+        """
+        Sample the exact pricer on a Chebyshev grid and fit the table.
+
+        Parameters:
+        - params: Dictionary with r, kappa, theta, sigma, rho (and v0 unless v0_range is given)
+        - moneyness: Range of K / S covered
+        - maturity: Range of maturities covered
+        - v0_range: Range of v0 covered; None keeps v0 fixed at params["v0"]
+        - degree: Nodes per axis (log-moneyness, maturity, v0)
+
+        Returns:
+        - HestonSurrogate with its error bound measured by `check_error`
+        """
+        domain = [tuple(np.log(moneyness)), tuple(maturity)]
+        if v0_range is not None:
+            domain.append(tuple(v0_range))
+            params = {k: v for k, v in params.items() if k != "v0"}
+        degree = degree[:len(domain)]
+
+        axes = [_from_unit(_chebyshev_nodes(n), lo, hi) for n, (lo, hi) in zip(degree, domain)]
+        grid = np.meshgrid(*axes, indexing="ij")
+        v0 = grid[2] if v0_range is not None else params["v0"]
+        fixed = {k: params[k] for k in PARAM_NAMES[:-1]}
+        values = heston_call_normalized(grid[0], grid[1], v0=v0, **fixed)
+
+        # Grid values -> coefficients, one axis at a time.
+        coefficients = values
+        for axis, n in enumerate(degree):
+            inv = np.linalg.inv(_chebyshev_basis(_chebyshev_nodes(n), n))
+            coefficients = np.moveaxis(np.tensordot(inv, coefficients, axes=(1, axis)), 0, axis)
+
+        table = cls(coefficients, {k: float(v) for k, v in params.items()}, [tuple(map(float, d)) for d in domain])
+        table.error_bound = table.check_error()
+        return table
+
+    def _normalized(self, log_moneyness, T, v0=None):
+        points = [log_moneyness, T] + ([v0] if self.has_v0_axis else [])
+        points = np.broadcast_arrays(*[np.asarray(p, dtype=np.float64) for p in points])
+        shape = points[0].shape
+        bases = [
+            _chebyshev_basis(_to_unit(p.ravel(), lo, hi), n)
+            for p, (lo, hi), n in zip(points, self.domain, self.coefficients.shape)
+        ]
+        coefficients = np.asarray(self.coefficients)
+        out = bases[0] @ coefficients.reshape(coefficients.shape[0], -1)
+        if self.has_v0_axis:
+            out = out.reshape(-1, *coefficients.shape[1:]) * bases[2][:, None, :]
+            out = out.sum(axis=2)
+        return np.sum(out * bases[1], axis=1).reshape(shape)
+
+    def covers(self, params, S, K, T, v0=None):
+        """True if the fixed parameters match and every (K / S, T, v0) lies inside the table's domain."""
+        for name, value in self.params.items():
+            if not np.isclose(params[name], value, rtol=0, atol=1e-12):
+                return False
+        points = [np.log(np.asarray(K) / np.asarray(S)), T] + ([v0] if self.has_v0_axis else [])
+        return all(
+            np.all((np.asarray(p) >= lo - 1e-12) & (np.asarray(p) <= hi + 1e-12))
+            for p, (lo, hi) in zip(points, self.domain)
+        )
+
+    def price(self, S, K, T, option="call", v0=None):
+        """
+        Vectorized surrogate price; inputs broadcast against each other.
+
+        Points outside the domain are clamped to its edge, so check `covers`
+        first (SurrogatePricer does).
+        """
+        S = np.asarray(S, dtype=np.float64)
+        call = S * self._normalized(np.log(np.asarray(K) / S), T, v0)
+        if option == "call":
+            return call
+        return call - S + np.asarray(K) * np.exp(-self.params["r"] * np.asarray(T))
+
+    def check_error(self, samples=2_000, seed=0):
+        """
+        Largest absolute error of C / S against the exact pricer on random
+        points of the domain (a price error bound per unit of spot).
+        """
+        rng = np.random.default_rng(seed)
+        points = [rng.uniform(lo, hi, samples) for lo, hi in self.domain]
+        v0 = points[2] if self.has_v0_axis else self.params["v0"]
+        fixed = {k: self.params[k] for k in PARAM_NAMES[:-1]}
+        exact = heston_call_normalized(points[0], points[1], v0=v0, **fixed)
+        approx = self._normalized(*points)
+        return float(np.max(np.abs(exact - approx)))
+
+    def save(self, path):
+        """Write `path`.npy (coefficients) and `path`.json (parameters, domain, error bound)."""
+        np.save(path + ".npy", self.coefficients)
+        with open(path + ".json", "w") as f:
+            json.dump({"params": self.params, "domain": self.domain, "error_bound": self.error_bound}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        coefficients = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        return cls(coefficients, meta["params"], [tuple(d) for d in meta["domain"]], meta["error_bound"])
+
+
+class SurrogatePricer:
+    """
+    Heston pricer backed by a surrogate table on disk.
+
+    Requests are served from the table while the parameters match it and
+    the points are inside its domain; otherwise the table is rebuilt over a
+    domain widened to cover the request.  A rebuilt table that meets
+    `tolerance` is saved and used from then on.  One that does not (very
+    short maturities, say) is discarded, the previous table and domain are
+    kept, and the request is priced with the exact pricer instead.
+    """
+
+    def __init__(self, path, moneyness=(0.6, 1.6), maturity=(0.1, 3.0), v0_range=None, degree=(48, 16, 8),
+                 tolerance=1e-4):
+        self.path = path
+        self.moneyness = moneyness
+        self.maturity = maturity
+        self.v0_range = v0_range
+        self.degree = degree
+        self.tolerance = tolerance
+        self.table = HestonSurrogate.load(path) if os.path.exists(path + ".json") else None
+        if self.table is not None:
+            # Rebuilds start from the loaded table's domain, not the defaults.
+            domain = self.table.domain
+            self.moneyness = tuple(float(x) for x in np.exp(domain[0]))
+            self.maturity = tuple(domain[1])
+            self.v0_range = tuple(domain[2]) if self.table.has_v0_axis else None
+        self.rebuilds = 0
+        self.fallbacks = 0
+        self._rejected = set()
+
+    def _rebuild(self, params, S, K, T, v0):
+        """Try a table covering the request; returns False (keeping the current one) if it misses tolerance."""
+        m = np.asarray(K) / np.asarray(S)
+        moneyness = (float(min(self.moneyness[0], np.min(m))), float(max(self.moneyness[1], np.max(m))))
+        maturity = (float(min(self.maturity[0], np.min(T))), float(max(self.maturity[1], np.max(T))))
+        v0_range = self.v0_range
+        if v0_range is not None:
+            v0_range = (float(min(v0_range[0], np.min(v0))), float(max(v0_range[1], np.max(v0))))
+            params = {k: v for k, v in params.items() if k != "v0"}
+
+        # A build that failed once fails again; remember it instead of retrying.
+        key = (tuple(sorted(params.items())), moneyness, maturity, v0_range)
+        if key in self._rejected:
+            return False
+        table = HestonSurrogate.build(params, moneyness, maturity, v0_range, self.degree)
+        if table.error_bound > self.tolerance:
+            self._rejected.add(key)
+            return False
+
+        self.table, self.moneyness, self.maturity, self.v0_range = table, moneyness, maturity, v0_range
+        self.table.save(self.path)
+        self.rebuilds += 1
+        return True
+
+    def price(self, S, K, T, r, kappa, theta, sigma, rho, v0, option="call"):
+        """Same argument order as `heston_price`; S, K, T (and v0 with a v0 axis) may be arrays."""
+        params = {"r": r, "kappa": kappa, "theta": theta, "sigma": sigma, "rho": rho, "v0": v0}
+        if self.table is None or not self.table.covers(params, S, K, T, v0):
+            if not self._rebuild(params, S, K, T, v0):
+                self.fallbacks += 1
+                return self._exact(S, K, T, option, **params)
+        return self.table.price(S, K, T, option, v0 if self.table.has_v0_axis else None)
+
+    @staticmethod
+    def _exact(S, K, T, option, r, kappa, theta, sigma, rho, v0):
+        S, K, T = (np.asarray(x, dtype=np.float64) for x in (S, K, T))
+        call = S * heston_call_normalized(np.log(K / S), T, r, kappa, theta, sigma, rho, v0)
+        if option == "call":
+            return call
+        return call - S + K * np.exp(-r * T)
@@ -0,0 +1,320 @@
+import io
+from itertools import islice
+
+import numpy as np
+from scipy.special import gammaln
+from scipy.stats import chi2, hypergeom, t as t_dist
+
+# ==========================================================
+# Vectorized batch hypothesis tests
+# ==========================================================
+#
+# Every test runs column-wise over 2-D arrays: one column (or one table) is
+# one test, and all of them are evaluated in a single vectorized pass.  The
+# t-tests are written in terms of sufficient statistics (n, mean, variance)
+# so the same code serves in-memory arrays and CSV files streamed in chunks.
+# NaNs are treated as missing values, which lets segments of different sizes
+# share one array.  A test without a defined statistic (fewer than two
+# values, or zero standard error) gets NaN for (t, p), as in scipy, and
+# Benjamini–Hochberg leaves such tests out.
+
+
+def _p_value(dist, stat, alternative):
+    if alternative == "two-sided":
+        return 2 * dist.sf(np.abs(stat))
+    if alternative == "less":
+        return dist.cdf(stat)
+    if alternative == "greater":
+        return dist.sf(stat)
+    raise ValueError(f"Unknown alternative: {alternative}")
+
+
+def column_stats(X):
+    """Per-column count, mean and sample variance of a 2-D array, ignoring NaNs."""
+    X = np.asarray(X, dtype=np.float64)
+    n = np.sum(~np.isnan(X), axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.nansum(X, axis=0) / n
+        var = np.nansum((X - mean)**2, axis=0) / (n - 1)
+    return n, mean, var
+
+
+# ----------------------------------------------------------
+# t-tests
+# ----------------------------------------------------------
+
+def ttest_1samp_from_stats(n, mean, var, mu0=0.0, alternative="two-sided"):
+    """One-sample t-test from per-column (n, mean, variance); returns (t, p)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se = np.sqrt(var / n)
+        t_stat = np.where(se > 0, (mean - mu0) / se, np.nan)
+        return t_stat, _p_value(t_dist(np.maximum(n - 1, 1)), t_stat, alternative)
+
+
+def ttest_1samp(X, mu0=0.0, alternative="two-sided"):
+    """
+    One-sample t-test for every column of X.
+
+    A paired test is the one-sample test on the column-wise differences.
+
+    Parameters:
+    - X: Array of shape (observations, tests)
+    - mu0: Mean under H0 (scalar or one value per column)
+    - alternative: "two-sided", "less" or "greater"
+
+    Returns:
+    - Arrays (t, p) with one entry per column
+    """
+    return ttest_1samp_from_stats(*column_stats(X), mu0, alternative)
+
+
+def welch_ttest_from_stats(n1, mean1, var1, n2, mean2, var2, alternative="two-sided"):
+    """Welch two-sample t-test from per-column sufficient statistics; returns (t, p, df)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se1, se2 = var1 / n1, var2 / n2
+        se = np.sqrt(se1 + se2)
+        t_stat = np.where(se > 0, (mean1 - mean2) / se, np.nan)
+        df = np.where(se > 0, (se1 + se2)**2 / (se1**2 / (n1 - 1) + se2**2 / (n2 - 1)), np.nan)
+        return t_stat, _p_value(t_dist(np.where(se > 0, df, 1.0)), t_stat, alternative), df
+
+
+def welch_ttest(A, B, alternative="two-sided"):
+    """
+    Welch (unequal variance) two-sample t-test, column by column.
+
+    Parameters:
+    - A, B: Arrays of shape (observations, tests); row counts may differ
+    - alternative: "two-sided", "less" (mean A < mean B) or "greater"
+
+    Returns:
+    - Arrays (t, p, df) with one entry per column
+    """
+    return welch_ttest_from_stats(*column_stats(A), *column_stats(B), alternative)
+
+
+# ----------------------------------------------------------
+# Chi-square and Fisher tests
+# ----------------------------------------------------------
+
+def chi2_gof(observed, expected=None):
+    """
+    Chi-square goodness-of-fit test for every column of `observed`.
+
+    Parameters:
+    - observed: Counts of shape (categories, tests)
+    - expected: Expected counts of the same shape, or probabilities of
+      shape (categories,); uniform when omitted
+
+    Returns:
+    - Arrays (chi2, p) with one entry per column
+    """
+    observed = np.asarray(observed, dtype=np.float64)
+    total = observed.sum(axis=0)
+    if expected is None:
+        expected = np.broadcast_to(total / observed.shape[0], observed.shape)
+    else:
+        expected = np.asarray(expected, dtype=np.float64)
+        if expected.ndim == 1:
+            expected = expected[:, None] / expected.sum() * total
+    stat = np.sum((observed - expected)**2 / expected, axis=0)
+    return stat, chi2.sf(stat, observed.shape[0] - 1)
+
+
+def chi2_independence(tables, correction=True):
+    """
+    Chi-square test of independence for a stack of contingency tables.
+
+    Parameters:
+    - tables: Counts of shape (tests, rows, cols)
+    - correction: Apply Yates' continuity correction to 2x2 tables, as
+      scipy.stats.chi2_contingency does by default
+
+    Returns:
+    - Arrays (chi2, p, df, expected)
+    """
+    tables = np.asarray(tables, dtype=np.float64)
+    total = tables.sum(axis=(1, 2), keepdims=True)
+    expected = tables.sum(axis=2, keepdims=True) * tables.sum(axis=1, keepdims=True) / total
+    df = (tables.shape[1] - 1) * (tables.shape[2] - 1)
+
+    diff = np.abs(tables - expected)
+    if correction and df == 1:
+        diff = np.maximum(diff - 0.5, 0)
+    stat = np.sum(diff**2 / expected, axis=(1, 2))
+    return stat, chi2.sf(stat, df), df, expected
+
+
+def _hypergeom_logpmf(x, total, col1, row1):
+    def log_binom(n, k):
+        return gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+    return log_binom(col1, x) + log_binom(total - col1, row1 - x) - log_binom(total, row1)
+
+
+def _first_true(cond, lo, hi):
+    """Vectorized bisection: smallest x in [lo, hi] with cond(x) true (hi + 1 if none); cond must be monotone."""
+    lo, hi = lo.copy(), hi + 1
+    while np.any(lo < hi):
+        mid = (lo + hi) // 2
+        c = cond(np.minimum(mid, hi - 1)) & (lo < hi)
+        hi = np.where(c, mid, hi)
+        lo = np.where(c | (lo >= hi), lo, mid + 1)
+    return lo
+
+
+def fisher_exact(tables, alternative="two-sided"):
+    """
+    Fisher's exact test for a stack of 2x2 tables [[a, b], [c, d]].
+
+    One-sided p-values are hypergeometric tail probabilities.  The two-sided
+    p-value adds the tail on the other side of the mode, cut where the pmf
+    drops to the observed pmf; since the pmf is unimodal that cut is found
+    by a bisection run on all tables at once, so the cost per table does not
+    grow with its counts.
+
+    Parameters:
+    - tables: Integer counts of shape (tests, 2, 2)
+    - alternative: "two-sided", "less" or "greater"
+
+    Returns:
+    - Arrays (odds_ratio, p)
+    """
+    tables = np.asarray(tables, dtype=np.int64)
+    a, b = tables[:, 0, 0], tables[:, 0, 1]
+    c, d = tables[:, 1, 0], tables[:, 1, 1]
+    row1, col1, total = a + b, a + c, a + b + c + d
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        odds_ratio = (a * d) / (b * c)
+
+    if alternative == "less":
+        p = hypergeom.cdf(a, total, col1, row1)
+    elif alternative == "greater":
+        p = hypergeom.sf(a - 1, total, col1, row1)
+    elif alternative == "two-sided":
+        lo = np.maximum(0, row1 + col1 - total)
+        hi = np.minimum(row1, col1)
+        mode = (row1 + 1) * (col1 + 1) // (total + 2)
+        # Relative tolerance as in scipy.stats.fisher_exact.
+        threshold = _hypergeom_logpmf(a, total, col1, row1) + np.log1p(1e-7)
+
+        def at_most_observed(x):
+            return _hypergeom_logpmf(x, total, col1, row1) <= threshold
+
+        # a below the mode: the other tail starts at the first x >= mode
+        # with pmf(x) <= pmf(a).  a above the mode: it ends just before the
+        # first x >= lo with pmf(x) > pmf(a).
+        upper_start = _first_true(at_most_observed, mode, hi)
+        lower_end = _first_true(lambda x: ~at_most_observed(x), lo, mode) - 1
+        p = np.where(
+            a < mode,
+            hypergeom.cdf(a, total, col1, row1) + hypergeom.sf(upper_start - 1, total, col1, row1),
+            hypergeom.sf(a - 1, total, col1, row1) + hypergeom.cdf(lower_end, total, col1, row1),
+        )
+        p = np.where(a == mode, 1.0, p)
+    else:
+        raise ValueError(f"Unknown alternative: {alternative}")
+    # An empty table carries no evidence (scipy's hypergeom is undefined there).
+    p = np.where(total == 0, 1.0, p)
+    return odds_ratio, np.minimum(p, 1.0)
+
+
+# ----------------------------------------------------------
+# Multiple testing
+# ----------------------------------------------------------
+
+def benjamini_hochberg(p, alpha=0.05):
+    """
+    Benjamini–Hochberg false discovery rate control.
+
+    NaN p-values (tests that could not be run) are left out: they are not
+    ranked, do not count towards the number of tests m, and get a NaN q and
+    reject=False.
+
+    Returns:
+    - Arrays (reject, q) where q are the BH-adjusted p-values
+    """
+    p = np.asarray(p, dtype=np.float64)
+    flat = p.ravel()
+    tested = np.flatnonzero(~np.isnan(flat))
+    m = tested.size
+    order = tested[np.argsort(flat[tested])]
+    ranked = flat[order] * m / np.arange(1, m + 1)
+    q = np.full(flat.size, np.nan)
+    q[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    q = q.reshape(p.shape)
+    return np.nan_to_num(q, nan=np.inf) <= alpha, q
+
+
+# ----------------------------------------------------------
+# Streaming CSV input
+# ----------------------------------------------------------
+
+class StreamingMoments:
+    """
+    Per-column count, mean and variance accumulated chunk by chunk.
+
+    Chunks are merged with Chan's parallel update, so the result matches a
+    single pass over the whole file without holding it in memory.
+    """
+
+    def __init__(self):
+        self.n = self.mean = self.m2 = None
+
+    def update(self, chunk):
+        n, mean, var = column_stats(chunk)
+        m2 = np.where(n > 1, var * (n - 1), 0.0)
+        mean = np.where(n > 0, mean, 0.0)
+        if self.n is None:
+            self.n, self.mean, self.m2 = n, mean, m2
+            return self
+        total = self.n + n
+        delta = mean - self.mean
+        with np.errstate(invalid="ignore"):
+            weight = np.where(total > 0, n / total, 0.0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + m2 + delta**2 * self.n * weight
+        self.n = total
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1)
+
+    def stats(self):
+        return self.n, self.mean, self.var
+
+
+def iter_csv_chunks(source, chunk_rows=100_000, delimiter=","):
+    """
+    Read a numeric CSV with a header row in chunks.
+
+    Parameters:
+    - source: Path or file object (text or binary)
+    - chunk_rows: Rows per chunk
+
+    Yields:
+    - Tuples (header, array of shape (rows, columns)); empty cells are NaN
+    """
+    handle = open(source, newline="") if isinstance(source, str) else source
+    if isinstance(handle, (io.RawIOBase, io.BufferedIOBase)) or hasattr(handle, "getbuffer"):
+        handle = io.TextIOWrapper(handle, encoding="utf-8")
+    try:
+        header = [h.strip() for h in handle.readline().split(delimiter)]
+        while True:
+            lines = list(islice(handle, chunk_rows))
+            if not lines:
+                break
+            chunk = np.genfromtxt(lines, delimiter=delimiter, dtype=np.float64, ndmin=2)
+            yield header, chunk
+    finally:
+        if isinstance(source, str):
+            handle.close()
+
+
+def csv_moments(source, chunk_rows=100_000, delimiter=","):
+    """Stream a CSV and return (header, StreamingMoments) over all of its columns."""
+    moments = StreamingMoments()
+    header = None
+    for header, chunk in iter_csv_chunks(source, chunk_rows, delimiter):
+        moments.update(chunk)
+    return header, moments
@@ -0,0 +1,160 @@
+import numpy as np
+
+from simulators import block_sizes
+
+# ==========================================================
+# Correlated multi-asset GBM
+# ==========================================================
+#
+# The single-asset `simulate_gbm` draws one scalar at a time and keeps every
+# path.  Here the assets are correlated through one Cholesky factor, the
+# increments for a whole chunk of time steps come from a single batched
+# matmul, and the (paths, steps, assets) tensor is never formed: paths are
+# processed in blocks and only running portfolio statistics and per-asset
+# terminal moments are kept.  The draws and the per-step work go into
+# preallocated buffers, so the simulation state is one (chunk, block,
+# assets) array of draws plus two (block, assets) arrays.
+
+
+def nearest_correlation(C, tol=1e-10, max_iter=200):
+    """
+    Nearest correlation matrix (unit diagonal, positive semidefinite).
+
+    Higham's alternating projections with Dykstra's correction.
+
+    Parameters:
+    - C: Symmetric matrix with unit diagonal that may be indefinite
+
+    Returns:
+    - Repaired correlation matrix
+    """
+    Y = np.array(C, dtype=np.float64)
+    correction = np.zeros_like(Y)
+    for _ in range(max_iter):
+        R = Y - correction
+        w, V = np.linalg.eigh(R)
+        X = (V * np.maximum(w, 0)) @ V.T
+        correction = X - R
+        Y_prev, Y = Y, X.copy()
+        np.fill_diagonal(Y, 1.0)
+        if np.linalg.norm(Y - Y_prev, "fro") < tol * max(1.0, np.linalg.norm(Y, "fro")):
+            break
+    return (Y + Y.T) / 2
+
+
+def validate_correlation(C, repair=True, tol=1e-10):
+    """
+    Check that C is a valid correlation matrix, repairing it if asked to.
+
+    Returns:
+    - Tuple (correlation matrix, repaired flag)
+    """
+    C = np.asarray(C, dtype=np.float64)
+    if C.ndim != 2 or C.shape[0] != C.shape[1]:
+        raise ValueError("Correlation matrix must be square.")
+    if not np.allclose(C, C.T, atol=tol):
+        raise ValueError("Correlation matrix must be symmetric.")
+    if not np.allclose(np.diag(C), 1.0, atol=tol) or np.any(np.abs(C) > 1 + tol):
+        raise ValueError("Correlation matrix must have a unit diagonal and entries in [-1, 1].")
+
+    if np.linalg.eigvalsh(C)[0] >= -tol:
+        return C, False
+    if not repair:
+        raise ValueError("Correlation matrix is not positive semidefinite.")
+    return nearest_correlation(C, tol), True
+
+
+def correlation_factor(C):
+    """Matrix L with L @ L.T == C; falls back to an eigen-factor when C is singular."""
+    try:
+        return np.linalg.cholesky(C)
+    except np.linalg.LinAlgError:
+        w, V = np.linalg.eigh(C)
+        return V * np.sqrt(np.maximum(w, 0))
+
+
+def simulate_portfolio(S0, mu, sigma, corr, weights, T, steps, paths, block_size=4_000, chunk_steps=8,
+                       dtype=np.float32, repair=True, seed=None):
+    """
+    Simulate correlated GBM assets and stream portfolio statistics.
+
+    Parameters:
+    - S0, mu, sigma: Initial prices, drifts and volatilities, one per asset
+    - corr: Correlation matrix of the Brownian drivers
+    - weights: Units held of each asset
+    - T: Time horizon
+    - steps: Number of time steps
+    - paths: Number of simulated paths
+    - block_size: Paths simulated together
+    - chunk_steps: Time steps whose increments are drawn in one batch
+    - dtype: Floating type of the simulated state (float32 halves the memory);
+      the peak is about (chunk_steps + 2) * block_size * assets of these
+    - repair: Replace an indefinite correlation matrix by the nearest valid one
+    - seed: Seed for np.random.SeedSequence
+
+    Returns:
+    - Dictionary with the time grid, mean and standard deviation of the
+      portfolio value at every step, the terminal portfolio values, per-asset
+      terminal mean and standard deviation, and whether corr was repaired
+    """
+    S0, mu, sigma, weights = (np.asarray(x, dtype=np.float64) for x in (S0, mu, sigma, weights))
+    corr, repaired = validate_correlation(corr, repair)
+    L = correlation_factor(corr).astype(dtype)
+
+    dt = T / steps
+    drift = ((mu - 0.5 * sigma**2) * dt).astype(dtype)
+    vol = (sigma * np.sqrt(dt)).astype(dtype)
+    log_S0 = np.log(S0).astype(dtype)
+
+    value_sum = np.zeros(steps + 1)
+    value_sq = np.zeros(steps + 1)
+    asset_sum = np.zeros(len(S0))
+    asset_sq = np.zeros(len(S0))
+    terminal_value = np.empty(paths)
+
+    weights_t = weights.astype(dtype)
+    z = np.empty(min(chunk_steps, steps) * min(block_size, paths) * len(S0), dtype=dtype)
+    buf = np.empty((min(block_size, paths), len(S0)), dtype=dtype)
+
+    start = 0
+    sizes = block_sizes(paths, block_size)
+    for n, ss in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        rng = np.random.default_rng(ss)
+        log_S = np.broadcast_to(log_S0, (n, len(S0))).copy()
+        step = buf[:n]
+        value = np.full(n, weights @ S0)
+        value_sum[0] += value.sum()
+        value_sq[0] += (value**2).sum()
+
+        for k0 in range(0, steps, chunk_steps):
+            c = min(chunk_steps, steps - k0)
+            draws = z[:c * n * len(S0)].reshape(c, n, len(S0))
+            rng.standard_normal(out=draws, dtype=dtype)
+            for j in range(c):
+                np.matmul(draws[j], L.T, out=step)
+                step *= vol
+                step += drift
+                log_S += step
+                np.exp(log_S, out=step)
+                value = (step @ weights_t).astype(np.float64)
+                value_sum[k0 + j + 1] += value.sum()
+                value_sq[k0 + j + 1] += (value**2).sum()
+
+        # `step` now holds the terminal prices.
+        asset_sum += step.sum(axis=0, dtype=np.float64)
+        np.square(step, out=step)
+        asset_sq += step.sum(axis=0, dtype=np.float64)
+        terminal_value[start:start + n] = value
+        start += n
+
+    value_mean = value_sum / paths
+    asset_mean = asset_sum / paths
+    return {
+        "t": np.linspace(0, T, steps + 1),
+        "portfolio_mean": value_mean,
+        "portfolio_std": np.sqrt(np.maximum(value_sq / paths - value_mean**2, 0)),
+        "terminal_portfolio": terminal_value,
+        "asset_terminal_mean": asset_mean,
+        "asset_terminal_std": np.sqrt(np.maximum(asset_sq / paths - asset_mean**2, 0)),
+        "repaired": repaired,
+    }
@@ -0,0 +1,217 @@
+import multiprocessing
+import os
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import norm
+
+from hypothesisTests import column_stats
+
+# ==========================================================
+# Permutation and bootstrap tests
+# ==========================================================
+#
+# Resamples are drawn in vectorized blocks: one block is a (block_size, n)
+# array of index draws and its test statistics come out of a single
+# column-wise computation.  Blocks are spread over a process pool, each with
+# its own spawned seed, and are submitted in rounds so the run can stop as
+# soon as the confidence interval of the Monte Carlo p-value lies entirely on
+# one side of the significance level.
+#
+# A resample in which both groups are constant has no t-statistic (0 / 0 or
+# x / 0).  Such degenerate resamples are left out of both the count of
+# extreme statistics and the number of resamples the p-value is based on.
+
+
+def welch_t(A, B):
+    """Welch t-statistic for every row of A against the same row of B; NaN where both rows are constant."""
+    n1, m1, v1 = column_stats(A.T)
+    n2, m2, v2 = column_stats(B.T)
+    se = np.sqrt(v1 / n1 + v2 / n2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(se > 0, (m1 - m2) / se, np.nan)
+
+
+def _count_extreme(stats, observed, alternative):
+    # Returns (extreme, valid): degenerate (NaN) statistics count in neither.
+    # The tolerance keeps resamples that tie with the observed statistic
+    # from being lost to rounding.
+    stats = stats[~np.isnan(stats)]
+    eps = 1e-12 * max(1.0, abs(observed))
+    if alternative == "two-sided":
+        extreme = np.abs(stats) >= abs(observed) - eps
+    elif alternative == "less":
+        extreme = stats <= observed + eps
+    else:
+        extreme = stats >= observed - eps
+    return int(np.sum(extreme)), stats.size
+
+
+def _permutation_block(a, b, observed, alternative, size, seed):
+    rng = np.random.default_rng(seed)
+    pooled = np.concatenate([a, b])
+    idx = rng.permuted(np.broadcast_to(np.arange(pooled.size), (size, pooled.size)), axis=1)
+    shuffled = pooled[idx]
+    stats = welch_t(shuffled[:, :a.size], shuffled[:, a.size:])
+    return _count_extreme(stats, observed, alternative) + (None,)
+
+
+def _bootstrap_block(a, b, observed, alternative, size, seed):
+    # p-value from resampling groups that were shifted to a common mean (the
+    # null hypothesis); the CI from resampling the original groups with the
+    # same indices.
+    rng = np.random.default_rng(seed)
+    ia = rng.integers(0, a.size, (size, a.size))
+    ib = rng.integers(0, b.size, (size, b.size))
+    pooled_mean = np.concatenate([a, b]).mean()
+    a0, b0 = a - a.mean() + pooled_mean, b - b.mean() + pooled_mean
+    stats = welch_t(a0[ia], b0[ib])
+    diffs = a[ia].mean(axis=1) - b[ib].mean(axis=1)
+    return _count_extreme(stats, observed, alternative) + (diffs,)
+
+
+def _wilson_interval(count, n, confidence):
+    z = norm.ppf(0.5 + confidence / 2)
+    p = count / n
+    centre = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+    half = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+    return max(float(centre - half), 0.0), min(float(centre + half), 1.0)
+
+
+def _warm_up(seconds):
+    # Unpickling this function imports the module (numpy, scipy) in the worker.
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def process_pool(workers):
+    """
+    Process pool for the resampling tests, with its workers already started.
+
+    Workers are spawned, not forked: forked children of the multi-threaded
+    Streamlit server can deadlock.  Create the pool once and pass it as
+    `executor` to every test so process startup is paid only once.
+    """
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    # Spawned children re-import __main__, which inside Streamlit is the page
+    # script; hide it while the workers start.  Warm-up rounds run until
+    # every worker has answered, i.e. has started and done its imports.
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        ready = set()
+        for _ in range(100):
+            ready.update(pool.map(_warm_up, [0.05] * workers))
+            if len(ready) == workers:
+                break
+    finally:
+        sys.modules["__main__"] = main
+    return pool
+
+
+def _run(block_fn, a, b, alternative, alpha, max_resamples, block_size, workers, executor, confidence, seed):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    observed = float(welch_t(a[None, :], b[None, :])[0])
+    if np.isnan(observed):
+        raise ValueError("Both samples are constant; the t-statistic is undefined.")
+    workers = workers or os.cpu_count()
+    seeds = iter(np.random.SeedSequence(seed).spawn(-(-max_resamples // block_size)))
+
+    own_pool = executor is None and workers > 1
+    pool = process_pool(workers) if own_pool else executor
+
+    count = done = valid = 0
+    elapsed = 0.0
+    samples = []
+    stopped_early = False
+    # The rate is timed without pool startup and shutdown.
+    start = time.perf_counter()
+    try:
+        while done < max_resamples:
+            sizes = []
+            while len(sizes) < workers and done + sum(sizes) < max_resamples:
+                sizes.append(min(block_size, max_resamples - done - sum(sizes)))
+            args = [(a, b, observed, alternative, size, next(seeds)) for size in sizes]
+            if pool is None:
+                results = [block_fn(*x) for x in args]
+            else:
+                results = pool.map(block_fn, *zip(*args))
+            for extreme, used, sample in results:
+                count += extreme
+                valid += used
+                if sample is not None:
+                    samples.append(sample)
+            done += sum(sizes)
+            elapsed = time.perf_counter() - start
+
+            lower, upper = _wilson_interval(count + 1, valid + 1, confidence)
+            if done < max_resamples and (upper < alpha or lower > alpha):
+                stopped_early = True
+                break
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    return {
+        "statistic": observed,
+        "p_value": (count + 1) / (valid + 1),
+        "p_value_ci": _wilson_interval(count + 1, valid + 1, confidence),
+        "resamples": done,
+        "degenerate": done - valid,
+        "resamples_per_sec": done / elapsed if elapsed > 0 else float("inf"),
+        "stopped_early": stopped_early,
+    }, samples
+
+
+def permutation_test(a, b, alternative="two-sided", alpha=0.05, max_resamples=100_000,
+                     block_size=10_000, workers=1, executor=None, confidence=0.99, seed=None):
+    """
+    Two-sample permutation test of equal means using the Welch t-statistic.
+
+    Parameters:
+    - a, b: 1-D samples
+    - alternative: "two-sided", "less" (mean a < mean b) or "greater"
+    - alpha: Significance level the early-stopping rule is checked against
+    - max_resamples: Upper limit on the number of permutations
+    - block_size: Permutations drawn per vectorized block
+    - workers: Processes to spread blocks over (1 runs in-process, None uses all CPUs);
+      a pool is started and shut down for this call only
+    - executor: Pool from `process_pool` to reuse instead; `workers` blocks
+      are then submitted to it per round
+    - confidence: Confidence level of the interval on the Monte Carlo p-value
+    - seed: Seed for np.random.SeedSequence
+
+    Returns:
+    - Dictionary with the statistic, p-value and its confidence interval,
+      resamples drawn, how many of them were degenerate (both groups
+      constant, excluded from the p-value), resamples per second and
+      whether it stopped early
+    """
+    result, _ = _run(_permutation_block, a, b, alternative, alpha, max_resamples, block_size,
+                     workers, executor, confidence, seed)
+    return result
+
+
+def bootstrap_test(a, b, alternative="two-sided", alpha=0.05, max_resamples=100_000,
+                   block_size=10_000, workers=1, executor=None, confidence=0.99, ci_level=0.95, seed=None):
+    """
+    Two-sample bootstrap test of equal means plus a percentile CI for mean(a) - mean(b).
+
+    The p-value resamples both groups after shifting them to the pooled
+    mean; the CI uses the same draws on the unshifted groups.  Parameters as
+    in `permutation_test`, with `ci_level` the level of the percentile CI.
+
+    Returns:
+    - Dictionary as in `permutation_test` plus "difference" and "ci"
+    """
+    result, samples = _run(_bootstrap_block, a, b, alternative, alpha, max_resamples, block_size,
+                           workers, executor, confidence, seed)
+    diffs = np.concatenate(samples)
+    tail = (1 - ci_level) / 2
+    result["difference"] = float(np.mean(a) - np.mean(b))
+    result["ci"] = tuple(float(q) for q in np.quantile(diffs, [tail, 1 - tail]))
+    return result
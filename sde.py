@@ -0,0 +1,192 @@
+import numpy as np
+
+# ==========================================================
+# Generic scalar SDE engine and multilevel Monte Carlo
+# ==========================================================
+#
+#     dX_t = a(t, X_t) dt + b(t, X_t) dW_t
+#
+# Drift and diffusion are vectorized callables a(t, x), b(t, x) acting on
+# arrays of paths.  The steppers take their Brownian increments from the
+# caller, which is what lets a fine and a coarse path share the same
+# Brownian motion in the multilevel estimator: the coarse increment is the
+# sum of M consecutive fine increments.
+
+
+def euler_step(t, x, dt, dW, drift, diffusion, diffusion_dx=None):
+    return x + drift(t, x) * dt + diffusion(t, x) * dW
+
+
+def milstein_step(t, x, dt, dW, drift, diffusion, diffusion_dx=None):
+    b = diffusion(t, x)
+    if diffusion_dx is None:
+        h = 1e-6 * np.maximum(np.abs(x), 1.0)
+        db = (diffusion(t, x + h) - diffusion(t, x - h)) / (2 * h)
+    else:
+        db = diffusion_dx(t, x)
+    return x + drift(t, x) * dt + b * dW + 0.5 * b * db * (dW**2 - dt)
+
+
+SCHEMES = {"euler": euler_step, "milstein": milstein_step}
+
+
+def simulate(drift, diffusion, x0, T, steps, paths, scheme="euler", diffusion_dx=None, t0=0.0, rng=None):
+    """
+    Simulate SDE paths on a uniform grid.
+
+    Parameters:
+    - drift, diffusion: Vectorized callables a(t, x) and b(t, x)
+    - x0: Initial value
+    - T: End time (the grid runs from t0 to T)
+    - steps: Number of time steps
+    - paths: Number of paths
+    - scheme: "euler" (Euler–Maruyama) or "milstein"
+    - diffusion_dx: Optional db/dx for Milstein; central differences otherwise
+    - rng: numpy Generator
+
+    Returns:
+    - Time grid and array of shape (paths, steps + 1)
+    """
+    rng = rng or np.random.default_rng()
+    step = SCHEMES[scheme]
+    dt = (T - t0) / steps
+    t = np.linspace(t0, T, steps + 1)
+    X = np.empty((paths, steps + 1))
+    X[:, 0] = x0
+    for j in range(steps):
+        dW = rng.normal(0, np.sqrt(dt), size=paths)
+        X[:, j + 1] = step(t[j], X[:, j], dt, dW, drift, diffusion, diffusion_dx)
+    return t, X
+
+
+def coupled_level(drift, diffusion, payoff, x0, T, level, paths, scheme="milstein", diffusion_dx=None,
+                  M=2, rng=None):
+    """
+    Payoffs of fine (M**level steps) and coarse (M**(level-1) steps) paths
+    driven by the same Brownian motion.
+
+    Returns:
+    - Arrays (P_fine, P_coarse); P_coarse is zero on level 0
+    """
+    rng = rng or np.random.default_rng()
+    step = SCHEMES[scheme]
+    n_fine = M**level
+    dt = T / n_fine
+    x_f = np.full(paths, float(x0))
+    x_c = np.full(paths, float(x0))
+    dW_c = np.zeros(paths)
+
+    for j in range(n_fine):
+        dW = rng.normal(0, np.sqrt(dt), size=paths)
+        x_f = step(j * dt, x_f, dt, dW, drift, diffusion, diffusion_dx)
+        if level > 0:
+            dW_c += dW
+            if (j + 1) % M == 0:
+                x_c = step((j + 1 - M) * dt, x_c, M * dt, dW_c, drift, diffusion, diffusion_dx)
+                dW_c = np.zeros(paths)
+
+    return payoff(x_f), (payoff(x_c) if level > 0 else np.zeros(paths))
+
+
+def mlmc(drift, diffusion, payoff, x0, T, eps, scheme="milstein", diffusion_dx=None, M=2,
+         min_levels=3, max_level=12, N0=1_000, batch=50_000, seed=None):
+    """
+    Giles' multilevel Monte Carlo estimate of E[f(X_T)] to RMS accuracy eps.
+
+    Samples per level follow N_l ∝ sqrt(V_l / C_l) from the measured level
+    variances V_l and costs C_l = M**l; levels are added until the estimated
+    weak error is below eps / sqrt(2).
+
+    Parameters:
+    - drift, diffusion, payoff: Vectorized callables a(t, x), b(t, x), f(x)
+    - x0, T: Initial value and maturity
+    - eps: Target root-mean-square error
+    - scheme, diffusion_dx: Stepper, see `simulate`
+    - M: Refinement factor between levels
+    - min_levels, max_level: Levels to start with and the finest level allowed
+    - N0: Initial samples on a new level
+    - batch: Largest number of paths simulated at once
+    - seed: Seed for np.random.default_rng
+
+    Returns:
+    - Dictionary with the estimate, samples/means/variances per level, the
+      MLMC cost and the cost of plain MC at the finest level for the same eps
+    """
+    rng = np.random.default_rng(seed)
+    # Per level: sum Y, sum Y^2, sum P_fine, sum P_fine^2, samples
+    sums = [np.zeros(5) for _ in range(min_levels)]
+    dN = [N0] * min_levels
+
+    def run(level, n):
+        while n > 0:
+            m = min(n, batch)
+            P_f, P_c = coupled_level(drift, diffusion, payoff, x0, T, level, m, scheme, diffusion_dx, M, rng)
+            Y = P_f - P_c
+            sums[level] += [Y.sum(), (Y**2).sum(), P_f.sum(), (P_f**2).sum(), m]
+            n -= m
+
+    while sum(dN) > 0:
+        for level, n in enumerate(dN):
+            run(level, n)
+
+        N = np.array([s[4] for s in sums])
+        mean = np.array([s[0] for s in sums]) / N
+        var = np.maximum(np.array([s[1] for s in sums]) / N - mean**2, 0)
+        cost = M ** np.arange(len(sums), dtype=float)
+
+        # Weak and strong rates from the finer levels, floored so that noise
+        # cannot stall the level selection.
+        levels = np.arange(1, len(sums))
+        alpha = max(0.5, -np.polyfit(levels, np.log(np.abs(mean[1:]) + 1e-300) / np.log(M), 1)[0])
+        beta = max(0.5, -np.polyfit(levels, np.log(var[1:] + 1e-300) / np.log(M), 1)[0])
+
+        N_opt = np.ceil(2 / eps**2 * np.sqrt(var / cost) * np.sum(np.sqrt(var * cost)))
+        dN = list(np.maximum(N_opt - N, 0).astype(int))
+
+        if all(d <= 0.01 * n for d, n in zip(dN, N)):
+            remaining = max(abs(mean[-1]), abs(mean[-2]) / M**alpha) / (M**alpha - 1)
+            if remaining > eps / np.sqrt(2):
+                if len(sums) > max_level:
+                    raise RuntimeError("MLMC failed to reach the target accuracy within max_level.")
+                var = np.append(var, var[-1] / M**beta)
+                cost = np.append(cost, cost[-1] * M)
+                sums.append(np.zeros(5))
+                N = np.append(N, 0)
+                N_opt = np.ceil(2 / eps**2 * np.sqrt(var / cost) * np.sum(np.sqrt(var * cost)))
+                dN = list(np.maximum(N_opt - N, 0).astype(int))
+
+    N = np.array([s[4] for s in sums])
+    mean = np.array([s[0] for s in sums]) / N
+    var = np.maximum(np.array([s[1] for s in sums]) / N - mean**2, 0)
+    cost = M ** np.arange(len(sums), dtype=float)
+    finest = sums[-1]
+    var_finest = max(finest[3] / finest[4] - (finest[2] / finest[4])**2, 0)
+    return {
+        "estimate": float(mean.sum()),
+        "levels": len(sums) - 1,
+        "samples": N.astype(int),
+        "level_means": mean,
+        "level_variances": var,
+        # Cost in fine-path steps; a coupled sample on level l > 0 also
+        # simulates the coarse path.
+        "cost": float(np.sum(N * (cost + np.where(np.arange(len(sums)) > 0, cost / M, 0)))),
+        "mc_cost": float(2 / eps**2 * var_finest * cost[-1]),
+    }
+
+
+def cost_vs_accuracy(drift, diffusion, payoff, x0, T, eps_values, **kwargs):
+    """
+    Run `mlmc` for each target accuracy and collect the costs.
+
+    eps^2 * cost should stay roughly flat for MLMC (O(eps^-2) work) and grow
+    for plain MC.
+
+    Returns:
+    - List of dictionaries with eps, estimate, levels, MLMC cost and MC cost
+    """
+    rows = []
+    for eps in eps_values:
+        result = mlmc(drift, diffusion, payoff, x0, T, eps, **kwargs)
+        rows.append({"eps": eps, "estimate": result["estimate"], "levels": result["levels"],
+                     "cost": result["cost"], "mc_cost": result["mc_cost"]})
+    return rows
@@ -0,0 +1,116 @@
+import numpy as np
+
+# ==========================================================
+# Vectorized path simulators (GBM / Heston)
+# ==========================================================
+#
+# The apps each carry their own time-stepping loop.  The pricing engines
+# built on top of them need the same dynamics as a reusable, import-safe
+# building block, so the one-step updates live here and operate on whole
+# arrays of paths at once.
+
+
+def gbm_step(S, r, sigma, dt, z):
+    """
+    Advance GBM prices one step with the exact log-normal update.
+
+    Parameters:
+    - S: Array of current prices
+    - r: Drift (risk-free rate under the pricing measure)
+    - sigma: Volatility
+    - dt: Step size
+    - z: Standard normal draws, same shape as S
+
+    Returns:
+    - Array of prices at t + dt
+    """
+    return S * np.exp((r - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * z)
+
+
+def heston_step(S, v, r, kappa, theta, sigma, rho, dt, z1, z2):
+    """
+    Advance Heston prices and variances one step.
+
+    Log-Euler step for the price with the variance floored at zero.  The
+    price is advanced with the variance at the start of the step, which
+    keeps the discounted price a martingale.
+
+    Parameters:
+    - S, v: Arrays of current prices and variances
+    - r, kappa, theta, sigma, rho: Heston parameters
+    - dt: Step size
+    - z1, z2: Independent standard normal draws, same shape as S
+
+    Returns:
+    - Tuple (S, v) at t + dt
+    """
+    z2 = rho * z1 + np.sqrt(1 - rho**2) * z2
+    S = S * np.exp((r - 0.5 * v) * dt + np.sqrt(v * dt) * z1)
+    v = np.maximum(v + kappa * (theta - v) * dt + sigma * np.sqrt(v * dt) * z2, 0)
+    return S, v
+
+
+class GBM:
+    """Risk-neutral GBM dynamics; the state is the tuple (S,)."""
+
+    n_factors = 1
+
+    def __init__(self, S0, r, sigma):
+        self.S0 = S0
+        self.r = r
+        self.sigma = sigma
+
+    def initial(self, paths, dtype=np.float64):
+        return (np.full(paths, self.S0, dtype=dtype),)
+
+    def step(self, state, dt, z):
+        return (gbm_step(state[0], self.r, self.sigma, dt, z[0]),)
+
+
+class Heston:
+    """Heston dynamics; the state is the tuple (S, v)."""
+
+    n_factors = 2
+
+    def __init__(self, S0, r, kappa, theta, sigma, rho, v0):
+        self.S0 = S0
+        self.r = r
+        self.kappa = kappa
+        self.theta = theta
+        self.sigma = sigma
+        self.rho = rho
+        self.v0 = v0
+
+    def initial(self, paths, dtype=np.float64):
+        return (np.full(paths, self.S0, dtype=dtype), np.full(paths, self.v0, dtype=dtype))
+
+    def step(self, state, dt, z):
+        S, v = state
+        return heston_step(S, v, self.r, self.kappa, self.theta, self.sigma, self.rho, dt, z[0], z[1])
+
+
+def advance(model, state, dt, steps, rng):
+    """
+    Advance a batch of states by `steps` time steps of size `dt`.
+
+    Parameters:
+    - model: GBM or Heston instance
+    - state: Tuple of arrays, one per model factor
+    - dt: Step size
+    - steps: Number of steps to take
+    - rng: numpy Generator supplying the normal draws
+
+    Returns:
+    - Tuple of arrays at t + steps * dt
+    """
+    paths = state[0].shape
+    for _ in range(steps):
+        z = rng.standard_normal((model.n_factors,) + paths)
+        state = model.step(state, dt, z)
+    return state
+
+
+def block_sizes(paths, block_size):
+    """Split `paths` into consecutive blocks of at most `block_size`."""
+    n_full, rest = divmod(paths, block_size)
+    return [block_size] * n_full + ([rest] if rest else [])